@@ -1,10 +1,129 @@
 # rdbms_core.py
 import re
 import os
+import json
+import bisect
+import atexit
 import pickle
+import struct
+import tempfile
+import types
 import datetime
 from enum import Enum
-from typing import Dict, List, Any, Set, Tuple
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None  # Vectorized scan paths degrade to pure-Python loops
+
+try:
+    import numba
+except ImportError:
+    numba = None  # Optional JIT for the numeric filter/aggregate kernels
+
+_NB_OPS = {'=': 0, '!=': 1, '>': 2, '<': 3, '>=': 4, '<=': 5}
+
+if numba is not None:
+    @numba.njit(cache=True, parallel=True)
+    def _nb_compare(col, op_code, v):
+        out = np.empty(col.shape[0], dtype=np.bool_)
+        for i in numba.prange(col.shape[0]):
+            x = col[i]
+            if op_code == 0: out[i] = x == v
+            elif op_code == 1: out[i] = x != v
+            elif op_code == 2: out[i] = x > v
+            elif op_code == 3: out[i] = x < v
+            elif op_code == 4: out[i] = x >= v
+            else: out[i] = x <= v
+        return out
+
+    @numba.njit(cache=True)
+    def _nb_sum_groupby(codes, values, n_groups):
+        out = np.zeros(n_groups, dtype=np.float64)
+        for i in range(codes.shape[0]):
+            out[codes[i]] += values[i]
+        return out
+
+# Statement patterns compiled once at import; the $ anchors also stop the lazy
+# SET/WHERE groups from matching empty and silently dropping the clause.
+# Case-sensitive: they match the keyword-normalized copy of the query (below).
+_WS_RE = re.compile(r"\s+")
+
+@lru_cache(maxsize=1024)
+def _normalize_ws(q: str) -> str:
+    """Collapse runs of whitespace in one C-level pass and drop any trailing
+    statement terminator; cached so the identical hot queries (dashboards,
+    REPL templates) skip normalization entirely."""
+    return _WS_RE.sub(" ", q.strip()).rstrip('; ')
+
+_RE_CREATE_INDEX = re.compile(r"CREATE INDEX (\w+) ON (\w+)\s*\((.*)\)")
+_RE_CREATE_TABLE = re.compile(r"CREATE TABLE (\w+)\s*\((.*)\)")
+_RE_FK = re.compile(r"FOREIGN KEY\s*\((.*?)\)\s*REFERENCES\s*(\w+)\s*\((.*?)\)")
+_RE_INSERT = re.compile(r"INSERT INTO (\w+).+VALUES\s*\((.*)\)")
+_RE_SELECT = re.compile(r"SELECT (.*?) FROM (\w+)(?:\s+WHERE\s+(.*?))?(?:\s+GROUP BY\s+(.*))?$")
+_RE_UPDATE = re.compile(r"UPDATE (\w+) SET (.*?)(?:\s+WHERE\s+(.*))?$")
+_RE_DELETE = re.compile(r"DELETE FROM (\w+)(?:\s+WHERE\s+(.*))?$")
+_RE_AGG_FUNC = re.compile(r"(SUM|AVG|COUNT|MIN|MAX)\((.*?)\)")
+_RE_JOIN = re.compile(r"SELECT (.*?) FROM (\w+)\s+(?:INNER\s+)?JOIN (\w+) ON (\w+)\.(\w+)\s*=\s*(\w+)\.(\w+)(?:\s+WHERE\s+(.*))?$")
+# VALUES argument splitter: quoted literal (either style) or a bare token up to the next comma
+_RE_ARG = re.compile(r"\s*(?:'([^']*)'|\"([^\"]*)\"|([^,]+?))\s*(?:,|$)")
+
+def _normalize_keywords(q: str) -> str:
+    """Length-preserving copy of q with everything outside quoted literals
+    uppercased. Patterns match this copy case-sensitively; group spans still
+    line up with the original text, so identifiers and literals keep their case."""
+    out, quote = [], None
+    for ch in q:
+        if quote is not None:
+            out.append(ch)
+            if ch == quote: quote = None
+        elif ch == "'" or ch == '"':
+            quote = ch
+            out.append(ch)
+        else:
+            out.append(ch.upper())
+    return ''.join(out)
+
+def _orig_groups(m, q: str):
+    """Pull each group's text from the original query via the match spans."""
+    return tuple(None if s < 0 else q[s:e] for s, e in (m.span(i) for i in range(1, m.re.groups + 1)))
+
+def _to_bool(v) -> bool:
+    return str(v).upper() == 'TRUE' if isinstance(v, str) else bool(v)
+
+_CONVERTERS = {'INTEGER': int, 'REAL': float, 'TEXT': str, 'DATE': str, 'BOOLEAN': _to_bool}
+
+# Snapshot file magic for the columnar binary format (anything else => legacy pickle)
+_SNAP_MAGIC = b'RDBC1\n'
+
+def _compile_row_predicate(items: List[Tuple]):
+    """Codegen a row->bool predicate from (col_idx, op, value) triples. Values stay
+    parameters so repeated queries with different literals reuse the same bytecode."""
+    parts, j = [], 0
+    for i, op, v in items:
+        if op == '=':
+            parts.append(f"row[{i}] is not None and row[{i}] == vals[{j}]")
+        elif op in ('!=', '>', '<', '>=', '<='):
+            parts.append(f"row[{i}] is not None and row[{i}] {op} vals[{j}]")
+        elif op == 'LIKE':
+            parts.append(f"row[{i}] is not None and vals[{j}] in str(row[{i}])")
+        else:
+            parts.append("False")  # Unsupported operator never matches (legacy behavior)
+            continue
+        j += 1
+    if not parts: return lambda row, vals: True
+    src = "lambda row, vals: " + " and ".join(f"({p})" for p in parts)
+    return eval(compile(src, '<pred>', 'eval'))
+
+def _predicate_params(items: List[Tuple]) -> Tuple:
+    vals = []
+    for _, op, v in items:
+        if op == '=': vals.append(v)
+        elif op in ('!=', '>', '<', '>=', '<='): vals.append(v)
+        elif op == 'LIKE': vals.append(str(v).replace('%', ''))
+    return tuple(vals)
 
 class DataType(Enum):
     INTEGER = "INTEGER"
@@ -20,22 +139,84 @@ class Constraint(Enum):
     FOREIGN_KEY = "FOREIGN KEY"
 
 class Transaction:
+    """Snapshot-style transaction state: updates/deletes live in each Table's
+    pending overlay until COMMIT, so no per-row copies are taken. Only inserts
+    need an undo entry, logged as fixed-width records in a spooled WAL file
+    instead of a Python tuple list, so memory stays constant for bulk loads."""
+    _REC = struct.Struct('<BHq')  # op, table id, row id
+    OP_INSERT = 0
+
     def __init__(self):
         self.active = False
-        self.undo_stack: List[Tuple[str, Any]] = [] 
+        self.touched: Set[str] = set()
+        self._wal = None  # created lazily on first logged insert
+        self._wal_tables: List[str] = []
+        self._wal_ids: Dict[str, int] = {}
 
     def begin(self):
         self.active = True
-        self.undo_stack = []
+        self.touched = set()
+        self.reset_log()
+
+    def reset_log(self):
+        if self._wal is not None:
+            self._wal.seek(0)
+            self._wal.truncate()
+        self._wal_tables = []
+        self._wal_ids = {}
 
     def log_insert(self, table_name: str, row_id: int):
-        if self.active: self.undo_stack.append(('DELETE', (table_name, row_id)))
+        if not self.active: return
+        if self._wal is None:
+            self._wal = tempfile.SpooledTemporaryFile(max_size=1 << 20)
+        tid = self._wal_ids.get(table_name)
+        if tid is None:
+            tid = self._wal_ids[table_name] = len(self._wal_tables)
+            self._wal_tables.append(table_name)
+        self._wal.write(self._REC.pack(self.OP_INSERT, tid, row_id))
+
+    def replay_undo(self):
+        """Yield (op, table_name, row_id) for logged records, newest first."""
+        if self._wal is None: return
+        rec = self._REC.size
+        end = self._wal.tell()
+        for off in range(end - rec, -1, -rec):
+            self._wal.seek(off)
+            op, tid, rid = self._REC.unpack(self._wal.read(rec))
+            yield op, self._wal_tables[tid], rid
+        self._wal.seek(end)
 
-    def log_delete(self, table_name: str, row_data: List[Any], row_id: int):
-        if self.active: self.undo_stack.append(('INSERT', (table_name, row_data, row_id)))
+    def touch(self, table_name: str):
+        if self.active: self.touched.add(table_name)
 
-    def log_update(self, table_name: str, row_id: int, old_data: List[Any]):
-        if self.active: self.undo_stack.append(('UPDATE', (table_name, row_id, old_data)))
+class RowView:
+    """Dict-like read view over a Table's columnar storage (legacy row access).
+    Merges the table's pending transaction overlay when one is active."""
+    def __init__(self, table: 'Table'):
+        self._t = table
+
+    def __len__(self):
+        t = self._t
+        if not t.pending: return len(t.row_ids)
+        return len(t.row_ids) - sum(1 for v in t.pending.values() if v is None)
+    def __iter__(self): return iter(self.keys())
+    def __contains__(self, row_id):
+        t = self._t
+        if t.pending and row_id in t.pending: return t.pending[row_id] is not None
+        return row_id in t.row_pos
+    def __getitem__(self, row_id): return self._t.get_row(row_id)
+
+    def keys(self): return [rid for rid, _ in self.items()]
+    def values(self):
+        t = self._t
+        if t.pending: return [row for _, row in t._merged_rows()]
+        cols = t.columns_data
+        return [[col[pos] for col in cols] for pos in range(len(t.row_ids))]
+    def items(self):
+        t = self._t
+        if t.pending: return t._merged_rows()
+        cols = t.columns_data
+        return [(rid, [col[pos] for col in cols]) for pos, rid in enumerate(t.row_ids)]
 
 class Table:
     def __init__(self, name: str, columns: List[Dict], primary_key: List[str] = None, foreign_keys: List[Dict] = None):
@@ -43,10 +224,25 @@ class Table:
         self.columns = columns
         self.primary_key = primary_key or []
         self.foreign_keys = foreign_keys or []
-        self.rows: Dict[int, List[Any]] = {}
+        # --- Columnar (SoA) storage: one list per column, parallel row_ids ---
+        self.columns_data: List[list] = [[] for _ in columns]
+        self.row_ids: List[int] = []
+        self.row_pos: Dict[int, int] = {}
+        # Uncommitted writes: row_id -> new values, or None for a tombstone
+        self.pending: Dict[int, Optional[List[Any]]] = {}
+        # Unique/PK entries overwritten by inserts over tombstoned rows, kept
+        # so ROLLBACK can re-point them at the original committed holder
+        self._displaced: List[Tuple[str, Any, int]] = []
         self.indexes: Dict[str, Dict[Any, Set[int]]] = {}
+        self._index_cols: Dict[str, str] = {}
+        # Sorted-index backing: index name -> sorted key list, column -> index name
+        self._sorted_keys: Dict[str, List[Any]] = {}
+        self._sorted_by_col: Dict[str, str] = {}
         self.row_id_counter = 1
         self.column_map = {col['name']: idx for idx, col in enumerate(columns)}
+        self._pred_cache: Dict[Tuple, Any] = {}
+        # Bumped on every committed write; lets derived caches detect staleness
+        self.data_version = 0
         
         # Unique Columns (Non-PK)
         self.unique_columns = []
@@ -58,214 +254,597 @@ class Table:
         if primary_key: self.indexes['__pk__'] = {}
         for col in self.unique_columns:
             self.indexes[f"__uniq_{col}"] = {}
+        self._rebuild_index_specs()
+
+        # Type coercion resolved once per column instead of per cell
+        self._converters: Tuple = tuple(_CONVERTERS.get(c['type'].upper(), lambda v: v) for c in columns)
+        self._nullable: Tuple = tuple(Constraint.NOT_NULL not in c['constraints'] and
+                                      Constraint.PRIMARY_KEY not in c['constraints'] for c in columns)
+        self.numeric_mask: Tuple = tuple(c['type'].upper() in ('INTEGER', 'REAL', 'FLOAT', 'DOUBLE')
+                                         for c in columns)
+
+        # Specialized straight-line insert generated for this exact schema
+        self._insert_fast = self._build_insert_fast()
+
+    _CONVERT_EXPRS = {
+        'INTEGER': "int({v})",
+        'REAL': "float({v})",
+        'TEXT': "str({v})",
+        'DATE': "str({v})",
+        'BOOLEAN': "(str({v}).upper() == 'TRUE') if isinstance({v}, str) else bool({v})",
+    }
+
+    def _build_insert_fast(self):
+        """Codegen an insert specialized to this table: per-column conversions,
+        NULL/PK/UNIQUE checks, and columnar appends with no generic dispatch."""
+        lines = [
+            "def _insert_fast(self, values, row_id=None):",
+            f"    if len(values) != {len(self.columns)}: raise ValueError(\"Column count mismatch in {self.name}\")",
+        ]
+        for i, col in enumerate(self.columns):
+            expr = self._CONVERT_EXPRS.get(col['type'].upper())
+            if expr is None: return None  # Unknown type: keep the generic path
+            conv = expr.format(v=f"v{i}")
+            lines.append(f"    v{i} = values[{i}]")
+            required = Constraint.NOT_NULL in col['constraints'] or Constraint.PRIMARY_KEY in col['constraints']
+            if required:
+                lines.append(f"    if v{i} is None: raise ValueError(\"NULL violation in {col['name']}\")")
+                lines.append(f"    try: v{i} = {conv}")
+            else:
+                lines.append(f"    try:")
+                lines.append(f"        if v{i} is not None: v{i} = {conv}")
+            lines.append(f"    except (TypeError, ValueError): raise ValueError(f\"Type mismatch: {{v{i}}} is not {col['type'].upper()}\")")
+        if self.primary_key:
+            pk_i = self.column_map[self.primary_key[0]]
+            lines.append(f"    if v{pk_i} in self.indexes['__pk__']: raise ValueError(f\"Primary Key violation: {{v{pk_i}}}\")")
+        for col in self.unique_columns:
+            i = self.column_map[col]
+            lines.append(f"    if v{i} is not None and v{i} in self.indexes['__uniq_{col}']:")
+            lines.append(f"        raise ValueError(f\"UNIQUE constraint violation: Column '{col}' value '{{v{i}}}' already exists\")")
+        lines += [
+            "    final_id = row_id if row_id is not None else self.row_id_counter",
+            "    if final_id in self.row_pos: raise ValueError(f\"System Error: Row ID {final_id} already occupied.\")",
+            "    self.row_pos[final_id] = len(self.row_ids)",
+            "    self.row_ids.append(final_id)",
+            "    cols = self.columns_data",
+        ]
+        lines += [f"    cols[{i}].append(v{i})" for i in range(len(self.columns))]
+        lines += [
+            "    if final_id >= self.row_id_counter: self.row_id_counter = final_id + 1",
+            "    row = [" + ", ".join(f"v{i}" for i in range(len(self.columns))) + "]",
+            "    self._update_indexes(final_id, row)",
+            "    self.data_version += 1",
+            "    return final_id",
+        ]
+        try:
+            ns = {}
+            exec(compile("\n".join(lines), f"<insert:{self.name}>", 'exec'), {'Constraint': Constraint}, ns)
+            return types.MethodType(ns['_insert_fast'], self)
+        except SyntaxError:
+            return None
+
+    @property
+    def rows(self) -> RowView:
+        return RowView(self)
+
+    def get_row(self, row_id: int) -> List[Any]:
+        if self.pending and row_id in self.pending:
+            vals = self.pending[row_id]
+            if vals is None: raise KeyError(row_id)  # deleted in the active transaction
+            return list(vals)
+        pos = self.row_pos[row_id]
+        return [col[pos] for col in self.columns_data]
+
+    def _merged_rows(self) -> List[Tuple[int, List[Any]]]:
+        """Committed rows with the pending overlay applied (active transaction reads)."""
+        out = []
+        pend = self.pending
+        cols = self.columns_data
+        for pos, rid in enumerate(self.row_ids):
+            if rid in pend:
+                vals = pend[rid]
+                if vals is None: continue
+                out.append((rid, list(vals)))
+            else:
+                out.append((rid, [col[pos] for col in cols]))
+        return out
+
+    def scan_column(self, col_idx: int):
+        """Return the column as a typed NumPy array for INTEGER/REAL columns, else None."""
+        if np is None: return None
+        t = self.columns[col_idx]['type'].upper()
+        if t == 'INTEGER': dtype = np.int64
+        elif t == 'REAL': dtype = np.float64
+        else: return None
+        try:
+            return np.asarray(self.columns_data[col_idx], dtype=dtype)
+        except (TypeError, ValueError):
+            return None  # NULLs or mixed values force the row-at-a-time path
 
     def insert(self, values: List[Any], row_id: int = None) -> int:
+        # The specialized insert checks committed indexes only; with an open
+        # overlay the generic path below applies transaction-aware checks
+        if self._insert_fast is not None and not self.pending:
+            return self._insert_fast(values, row_id)
         if len(values) != len(self.columns): raise ValueError(f"Column count mismatch in {self.name}")
-        validated = [self._validate(c, v) for c, v in zip(self.columns, values)]
+        validated = []
+        for v, conv, nullable, col in zip(values, self._converters, self._nullable, self.columns):
+            if v is None:
+                if not nullable: raise ValueError(f"NULL violation in {col['name']}")
+                validated.append(None); continue
+            try: validated.append(conv(v))
+            except (TypeError, ValueError): raise ValueError(f"Type mismatch: {v} is not {col['type'].upper()}")
 
-        # 1. PK Check
+        # 1. PK Check (a holder tombstoned in the open transaction frees its key;
+        # the displaced index entry is recorded so ROLLBACK can restore it)
+        displaced = []
         if self.primary_key:
             pk_val = validated[self.column_map[self.primary_key[0]]]
-            if pk_val in self.indexes.get('__pk__', {}): raise ValueError(f"Primary Key violation: {pk_val}")
+            holder = self.indexes.get('__pk__', {}).get(pk_val)
+            if holder is not None:
+                if self.pending.get(holder, False) is None:
+                    displaced.append(('__pk__', pk_val, holder))
+                else:
+                    raise ValueError(f"Primary Key violation: {pk_val}")
 
         # 2. Unique Check
         for col in self.unique_columns:
-            val = validated[self.column_map[col]]
+            ci = self.column_map[col]
+            val = validated[ci]
             if val is not None:
                 idx_name = f"__uniq_{col}"
-                if val in self.indexes[idx_name]:
-                    raise ValueError(f"UNIQUE constraint violation: Column '{col}' value '{val}' already exists")
+                holder = self.indexes[idx_name].get(val)
+                if holder is not None:
+                    if self.pending.get(holder, False) is None:
+                        displaced.append((idx_name, val, holder))
+                    else:
+                        raise ValueError(f"UNIQUE constraint violation: Column '{col}' value '{val}' already exists")
+                for p in self.pending.values():
+                    if p is not None and p[ci] == val:
+                        raise ValueError(f"UNIQUE constraint violation: Column '{col}' value '{val}' already exists")
 
         # 3. Row ID Resolution
         final_id = row_id if row_id is not None else self.row_id_counter
-        
+
         # Ensure we don't overwrite if manual ID was passed that conflicts with counter logic (rare collision check)
-        if final_id in self.rows:
-             raise ValueError(f"System Error: Row ID {final_id} already occupied.")
+        if final_id in self.row_pos:
+            if self.pending.get(final_id, False) is None:
+                final_id = self.row_id_counter  # tombstoned slot: allocate a fresh id
+            else:
+                raise ValueError(f"System Error: Row ID {final_id} already occupied.")
+        self._displaced.extend(displaced)
+
+        self.row_pos[final_id] = len(self.row_ids)
+        self.row_ids.append(final_id)
+        for col, v in zip(self.columns_data, validated):
+            col.append(v)
 
-        self.rows[final_id] = validated
-        
         # Advance counter if we used it or surpassed it
         if final_id >= self.row_id_counter:
             self.row_id_counter = final_id + 1
-        
+
         self._update_indexes(final_id, validated)
+        self.data_version += 1
         return final_id
 
-    def delete(self, row_id: int):
-        if row_id in self.rows:
-            self._remove_from_indexes(row_id, self.rows[row_id])
-            del self.rows[row_id]
+    def delete(self, row_id: int, deferred: bool = False):
+        if deferred:
+            if row_id in self.row_pos or row_id in self.pending: self.pending[row_id] = None
+            return
+        self.pending.pop(row_id, None)
+        if row_id not in self.row_pos: return
+        pos = self.row_pos.pop(row_id)
+        self._remove_from_indexes(row_id, [col[pos] for col in self.columns_data])
+        # Swap-pop: move the last row into the vacated slot
+        last = len(self.row_ids) - 1
+        moved = self.row_ids[last]
+        self.row_ids[pos] = moved
+        self.row_ids.pop()
+        for col in self.columns_data:
+            col[pos] = col[last]
+            col.pop()
+        if moved != row_id: self.row_pos[moved] = pos
+        self.data_version += 1
 
-    def update_row(self, row_id: int, new_values: List[Any]):
-        if row_id not in self.rows: return
-        
-        # Unique Check on Update
+    def update_row(self, row_id: int, new_values: List[Any], deferred: bool = False):
+        if row_id not in self.row_pos and row_id not in self.pending: return
+
+        # Unique Check on Update; deferred writes check the merged overlay view
+        # so a conflicting second UPDATE fails at statement time, not at COMMIT
         for col in self.unique_columns:
             col_idx = self.column_map[col]
             val = new_values[col_idx]
             if val is not None:
                 idx_name = f"__uniq_{col}"
-                if val in self.indexes[idx_name]:
-                    existing_ids = self.indexes[idx_name][val]
-                    if row_id not in existing_ids:
-                         raise ValueError(f"UNIQUE constraint violation: Column '{col}' value '{val}' already exists")
+                if deferred:
+                    if self._overlay_conflict(row_id, col_idx, idx_name, val):
+                        raise ValueError(f"UNIQUE constraint violation: Column '{col}' value '{val}' already exists")
+                else:
+                    existing_id = self.indexes[idx_name].get(val)
+                    if existing_id is not None and existing_id != row_id:
+                        raise ValueError(f"UNIQUE constraint violation: Column '{col}' value '{val}' already exists")
+
+        if deferred:
+            self.pending[row_id] = list(new_values)
+            return
 
-        self._remove_from_indexes(row_id, self.rows[row_id])
-        self.rows[row_id] = new_values
+        pos = self.row_pos[row_id]
+        self._remove_from_indexes(row_id, [col[pos] for col in self.columns_data])
+        for col, v in zip(self.columns_data, new_values):
+            col[pos] = v
         self._update_indexes(row_id, new_values)
+        self.data_version += 1
 
-    def _validate(self, col: Dict, val: Any) -> Any:
-        if val is None:
-            if Constraint.NOT_NULL in col['constraints'] or Constraint.PRIMARY_KEY in col['constraints']:
-                raise ValueError(f"NULL violation in {col['name']}")
-            return None
-        t = col['type'].upper()
-        try:
-            if t == 'INTEGER': return int(val)
-            if t == 'REAL': return float(val)
-            if t == 'TEXT': return str(val)
-            if t == 'BOOLEAN': return str(val).upper() == 'TRUE' if isinstance(val, str) else bool(val)
-            if t == 'DATE': return str(val)
-        except: raise ValueError(f"Type mismatch: {val} is not {t}")
-        return val
+    def _overlay_conflict(self, row_id: int, col_idx: int, idx_name: str, val) -> bool:
+        """Uniqueness check against the merged view: committed holders still
+        standing after the overlay, plus every other overlay value."""
+        existing = self.indexes[idx_name].get(val)
+        if existing is not None and existing != row_id and existing not in self.pending:
+            return True
+        for rid, vals in self.pending.items():
+            if rid != row_id and vals is not None and vals[col_idx] == val:
+                return True
+        return False
+
+    def validate_pending(self):
+        """Raise if the overlay cannot fold cleanly; called before any table
+        is mutated so a failing COMMIT leaves the store untouched."""
+        for rid, vals in self.pending.items():
+            if vals is None: continue
+            for col in self.unique_columns:
+                ci = self.column_map[col]
+                val = vals[ci]
+                if val is not None and self._overlay_conflict(rid, ci, f"__uniq_{col}", val):
+                    raise ValueError(f"UNIQUE constraint violation: Column '{col}' value '{val}' already exists")
+
+    def commit_pending(self) -> int:
+        """Fold the transaction overlay into the columnar store in one pass."""
+        n = len(self.pending)
+        pending, self.pending = self.pending, {}
+        # Deletes first so an update may take over a value a tombstone frees
+        for rid, vals in pending.items():
+            if vals is None: self.delete(rid)
+        for rid, vals in pending.items():
+            if vals is not None: self.update_row(rid, vals)
+        self._displaced.clear()
+        return n
+
+    def rollback_pending(self) -> int:
+        """Discard uncommitted writes — no per-row reversal needed."""
+        n = len(self.pending)
+        self.pending.clear()
+        # Re-point unique entries displaced by inserts over tombstoned rows;
+        # newest displacements first so the original holder wins
+        for idx_name, val, rid in reversed(self._displaced):
+            self.indexes[idx_name][val] = rid
+        self._displaced.clear()
+        return n
+
+    def _rebuild_index_specs(self):
+        """Resolve every index to (dict, col_idx, is_unique, sorted_keys) once,
+        so per-row maintenance iterates plain tuples with no name parsing."""
+        if self.primary_key and '__pk__' not in self.indexes: self.indexes['__pk__'] = {}
+        specs = []
+        for name, idx in self.indexes.items():
+            if name == '__pk__': col, unique = self.primary_key[0], True
+            elif name.startswith('__uniq_'): col, unique = name[7:], True
+            else: col, unique = self._index_cols.get(name, name.replace("idx_", "")), False
+            if col not in self.column_map: continue
+            specs.append((idx, self.column_map[col], unique, self._sorted_keys.get(name)))
+        self._index_specs = specs
 
     def _update_indexes(self, row_id: int, values: List[Any]):
-        if self.primary_key:
-            pk_val = values[self.column_map[self.primary_key[0]]]
-            if '__pk__' not in self.indexes: self.indexes['__pk__'] = {}
-            self.indexes['__pk__'][pk_val] = {row_id}
-        
-        for col in self.unique_columns:
-            val = values[self.column_map[col]]
-            if val is not None:
-                idx = self.indexes[f"__uniq_{col}"]
-                if val not in idx: idx[val] = set()
+        # PK/UNIQUE map value -> single row id (uniqueness guaranteed), no set per entry
+        for idx, ci, unique, skeys in self._index_specs:
+            val = values[ci]
+            if unique:
+                if val is not None: idx[val] = row_id
+            elif val not in idx:
+                idx[val] = {row_id}
+                # NULL/unorderable keys stay out of the sorted list; a range
+                # predicate can never match them anyway
+                if skeys is not None and val is not None:
+                    try: bisect.insort(skeys, val)
+                    except TypeError: pass
+            else:
                 idx[val].add(row_id)
 
-        for name, data in self.indexes.items():
-            if name.startswith('__'): continue
-            col = name.replace("idx_", "")
-            if col in self.column_map:
-                val = values[self.column_map[col]]
-                if val not in data: data[val] = set()
-                data[val].add(row_id)
-
     def _remove_from_indexes(self, row_id: int, values: List[Any]):
-        for name, data in self.indexes.items():
-            col = None
-            if name == '__pk__': col = self.primary_key[0]
-            elif name.startswith('__uniq_'): col = name.replace('__uniq_', '')
-            else: col = name.replace("idx_", "")
-            
-            if col in self.column_map:
-                val = values[self.column_map[col]]
-                if val in data:
-                    data[val].discard(row_id)
-                    if not data[val]: del data[val]
+        for idx, ci, unique, skeys in self._index_specs:
+            val = values[ci]
+            if unique:
+                if idx.get(val) == row_id: del idx[val]
+            elif val in idx:
+                idx[val].discard(row_id)
+                if not idx[val]:
+                    del idx[val]
+                    if skeys is not None and val is not None:
+                        try:
+                            i = bisect.bisect_left(skeys, val)
+                            if i < len(skeys) and skeys[i] == val: skeys.pop(i)
+                        except TypeError: pass
 
-    def select(self, conditions: List[Tuple] = None) -> List[Tuple[int, List[Any]]]:
+    def select(self, conditions: List[Tuple] = None, projection: Optional[List[int]] = None):
+        """Filter rows; returns (row_id, row) pairs, or projected rows directly
+        when `projection` (column indices) is given — fused into the scan loop."""
+        P = projection
+        if not conditions:
+            if P is None:
+                return self.rows.items()
+            if self.pending:
+                return [[row[i] for i in P] for _, row in self._merged_rows()]
+            data = self.columns_data
+            return [list(t) for t in zip(*(data[i] for i in P))]
+        pred, pvals = self._compile_predicate(conditions)
         results = []
-        pk_lookup = False
-        if conditions and self.primary_key:
+        # 0. Active transaction: filter the merged overlay view
+        if self.pending:
+            for rid, row in self._merged_rows():
+                try:
+                    if pred(row, pvals):
+                        results.append((rid, row) if P is None else [row[i] for i in P])
+                except TypeError: pass
+            return results
+        # 1. PK point lookup
+        if self.primary_key:
             for col, op, val in conditions:
                 if col == self.primary_key[0] and op == '=':
-                    idx = self.indexes.get('__pk__', {})
-                    if val in idx:
-                        for rid in idx[val]:
-                            if self._match(self.rows[rid], conditions):
-                                results.append((rid, self.rows[rid]))
-                    pk_lookup = True
-                    break
-        if pk_lookup: return results
-        for rid, row in self.rows.items():
-            if self._match(row, conditions): results.append((rid, row))
+                    rid = self.indexes.get('__pk__', {}).get(val)
+                    if rid is not None:
+                        row = self.get_row(rid)
+                        try:
+                            if pred(row, pvals):
+                                results.append((rid, row) if P is None else [row[i] for i in P])
+                        except TypeError: pass
+                    return results
+        cols = self.columns_data
+        # 2. Hash-index point lookup on a UNIQUE or secondary-indexed column
+        for col, op, val in conditions:
+            if op != '=' or col not in self.column_map: continue
+            v = self._coerce_literal(self.column_map[col], val)
+            if col in self.unique_columns:
+                rid = self.indexes[f"__uniq_{col}"].get(v)
+                cand = () if rid is None else (rid,)
+            else:
+                name = f"idx_{col}" if f"idx_{col}" in self.indexes else \
+                    next((n for n, c in self._index_cols.items() if c == col), None)
+                if name is None: continue
+                cand = self.indexes[name].get(v, ())
+            for rid in cand:
+                pos = self.row_pos[rid]
+                row = [c[pos] for c in cols]
+                try:
+                    if pred(row, pvals):
+                        results.append((rid, row) if P is None else [row[i] for i in P])
+                except TypeError: pass
+            return results
+        # 3. Sorted-index range walk: binary-search the key list, verify candidates
+        for col, op, val in conditions:
+            if op not in ('>', '<', '>=', '<='): continue
+            name = self._sorted_by_col.get(col)
+            if name is None: continue
+            keys = self._sorted_keys[name]
+            try:
+                if op == '>': lo, hi = bisect.bisect_right(keys, val), len(keys)
+                elif op == '>=': lo, hi = bisect.bisect_left(keys, val), len(keys)
+                elif op == '<': lo, hi = 0, bisect.bisect_left(keys, val)
+                else: lo, hi = 0, bisect.bisect_right(keys, val)
+            except TypeError:
+                continue
+            idx = self.indexes[name]
+            for k in keys[lo:hi]:
+                for rid in idx[k]:
+                    pos = self.row_pos[rid]
+                    row = [c[pos] for c in cols]
+                    try:
+                        if pred(row, pvals):
+                            results.append((rid, row) if P is None else [row[i] for i in P])
+                    except TypeError: pass
+            return results
+        # 4. Vectorized filter over typed column buffers
+        positions = self._scan_positions(conditions)
+        if positions is not None:
+            for pos in positions:
+                row = [col[pos] for col in cols]
+                try:
+                    if pred(row, pvals):
+                        results.append((self.row_ids[pos], row) if P is None else [row[i] for i in P])
+                except TypeError: pass
+            return results
+        # 5. Fallback: row-at-a-time scan with the compiled predicate
+        for pos, rid in enumerate(self.row_ids):
+            row = [col[pos] for col in cols]
+            try:
+                if pred(row, pvals):
+                    results.append((rid, row) if P is None else [row[i] for i in P])
+            except TypeError: pass
         return results
 
-    def _match(self, row: List, conds: List[Tuple]) -> bool:
-        if not conds: return True
-        for col, op, val in conds:
-            if col not in self.column_map: continue
-            cell = row[self.column_map[col]]
-            if cell is None: return False
-            try:
-                if op == '=': match = str(cell) == str(val)
-                elif op == '!=': match = cell != val
-                elif op == '>': match = cell > val
-                elif op == '<': match = cell < val
-                elif op == 'LIKE': match = str(val).replace('%','') in str(cell)
-                else: match = False
-            except: match = False
-            if not match: return False
-        return True
-
-    def create_index(self, name: str, col: str):
+    def _coerce_literal(self, col_idx: int, val: Any) -> Any:
+        """Convert a WHERE literal to the column's declared type once, so the
+        predicate compares natively instead of stringifying every cell."""
+        if val is None: return val
+        try: return self._converters[col_idx](val)
+        except (TypeError, ValueError): return val
+
+    def _compile_predicate(self, conds: List[Tuple]):
+        """Resolve condition columns to indices, then codegen/cache the row predicate."""
+        items = [(self.column_map[c], op,
+                  self._coerce_literal(self.column_map[c], v) if op == '=' else v)
+                 for c, op, v in conds if c in self.column_map]
+        key = tuple((i, op, type(v)) for i, op, v in items)
+        fn = self._pred_cache.get(key)
+        if fn is None:
+            fn = _compile_row_predicate(items)
+            self._pred_cache[key] = fn
+        return fn, _predicate_params(items)
+
+    def _scan_positions(self, conditions: List[Tuple]):
+        """Vector-evaluate numeric comparisons; returns candidate positions or None."""
+        if np is None: return None
+        mask = None
+        for col, op, val in conditions:
+            if col not in self.column_map or not isinstance(val, (int, float)): continue
+            if op not in _NB_OPS: continue
+            arr = self.scan_column(self.column_map[col])
+            if arr is None: continue
+            if numba is not None and len(arr) > 0:
+                m = _nb_compare(arr, _NB_OPS[op], float(val))
+            elif op == '=': m = arr == val
+            elif op == '!=': m = arr != val
+            elif op == '>': m = arr > val
+            elif op == '<': m = arr < val
+            elif op == '>=': m = arr >= val
+            else: m = arr <= val
+            mask = m if mask is None else mask & m
+        if mask is None: return None
+        return np.nonzero(mask)[0]
+
+    def create_index(self, name: str, col: str, sorted: bool = False):
         if col not in self.column_map: raise ValueError(f"Column {col} not found")
         self.indexes[name] = {}
-        idx = self.column_map[col]
-        for rid, row in self.rows.items():
-            val = row[idx]
-            if val not in self.indexes[name]: self.indexes[name][val] = set()
-            self.indexes[name][val].add(rid)
+        self._index_cols[name] = col
+        idx = self.indexes[name]
+        data = self.columns_data[self.column_map[col]]
+        for pos, rid in enumerate(self.row_ids):
+            val = data[pos]
+            if val not in idx: idx[val] = set()
+            idx[val].add(rid)
+        if sorted:
+            keys = [k for k in idx if k is not None]
+            try:
+                keys.sort()
+            except TypeError:
+                keys = None  # mixed keys aren't orderable; no range support
+            if keys is not None:
+                self._sorted_keys[name] = keys
+                self._sorted_by_col[col] = name
+        self._rebuild_index_specs()
 
 class SimpleRDBMS:
     def __init__(self, path: str = None):
         self.tables: Dict[str, Table] = {}
+        self.schema_version = 0  # bumped on CREATE/DROP; keys cached query plans
         self.path = path
         self.trx = Transaction()
+        self._dispatch = {"CREATE": self._create, "INSERT": self._insert, "SELECT": self._select,
+                          "UPDATE": self._update, "DELETE": self._delete, "DROP": self._drop}
+        # One buffered handle for the audit log instead of open/append/close per query
+        try:
+            self._audit_fh = open("audit.log", "a", buffering=1 << 16)
+            atexit.register(self._audit_fh.close)
+        except OSError:
+            self._audit_fh = None
         if path and os.path.exists(path): self.load()
 
     def execute(self, query: str) -> Dict[str, Any]:
         try:
-            q = " ".join(query.strip().split())
+            q = _normalize_ws(query)
             if not q: return {'status': 'error', 'message': 'Empty query'}
             
             self._log_query(q)
-            
-            cmd = q.split(' ')[0].upper()
-            if cmd == "BEGIN": 
+
+            nq = _normalize_keywords(q)
+            cmd = nq.split(' ', 1)[0]
+            if cmd == "BEGIN":
                 self.trx.begin(); return {'status': 'success', 'message': 'Transaction Started'}
             if cmd == "COMMIT":
-                self.trx.active = False; self.trx.undo_stack = []
+                try:
+                    # Validate every touched table before mutating any of them
+                    for tn in self.trx.touched:
+                        self.tables[tn].validate_pending()
+                except ValueError as e:
+                    self._rollback()
+                    return {'status': 'error', 'message': f'Commit aborted, rolled back: {e}'}
+                for tn in self.trx.touched:
+                    self.tables[tn].commit_pending()
+                self.trx.active = False; self.trx.reset_log(); self.trx.touched = set()
                 return {'status': 'success', 'message': 'Transaction Committed'}
             if cmd == "ROLLBACK": return self._rollback()
-            
-            if cmd == "CREATE": return self._create(q)
-            if cmd == "INSERT": return self._insert(q)
-            if cmd == "SELECT": return self._select(q)
-            if cmd == "UPDATE": return self._update(q)
-            if cmd == "DELETE": return self._delete(q)
-            if cmd == "DROP": return self._drop(q)
-            
+
+            handler = self._dispatch.get(cmd)
+            if handler: return handler(q, nq)
             return {'status': 'error', 'message': f"Unknown command: {cmd}"}
         except Exception as e:
             return {'status': 'error', 'message': f"Error: {str(e)}"}
 
+    def executemany(self, query: str, rows) -> Dict[str, Any]:
+        """Run one INSERT template for many rows; the statement is parsed and planned once."""
+        try:
+            q = _normalize_ws(query)
+            m = _RE_INSERT.match(_normalize_keywords(q))
+            if not m: return {'status': 'error', 'message': 'executemany only supports INSERT templates'}
+            tn = q[m.start(1):m.end(1)]
+            if tn not in self.tables: raise ValueError(f"Table {tn} not found")
+            rows = [list(r) for r in rows]
+            self._log_query(f"{q} -- executemany x{len(rows)}")
+            return self._insert_rows(self.tables[tn], rows)
+        except Exception as e:
+            return {'status': 'error', 'message': f"Error: {str(e)}"}
+
+    def insert_many(self, table_name: str, rows) -> Dict[str, Any]:
+        """Append rows straight through the storage layer, skipping SQL parsing entirely."""
+        try:
+            if table_name not in self.tables: raise ValueError(f"Table {table_name} not found")
+            rows = [list(r) for r in rows]
+            self._log_query(f"INSERT INTO {table_name} -- bulk x{len(rows)}")
+            return self._insert_rows(self.tables[table_name], rows)
+        except Exception as e:
+            return {'status': 'error', 'message': f"Error: {str(e)}"}
+
+    def _insert_rows(self, t: Table, rows: List[List[Any]]) -> Dict[str, Any]:
+        # Resolve FK lookup indexes and the PK position once for the whole batch
+        fk_checks = []
+        for fk in t.foreign_keys:
+            rt = self.tables[fk['ref_table']]
+            if rt.primary_key and fk['ref_col'] == rt.primary_key[0]:
+                idx = rt.indexes.get('__pk__', {})
+            else:
+                idx_name = f"idx_{fk['ref_col']}"
+                if idx_name not in rt.indexes: rt.create_index(idx_name, fk['ref_col'])
+                idx = rt.indexes[idx_name]
+            fk_checks.append((t.column_map[fk['col']], idx, fk['ref_table']))
+        pk_idx = t.column_map[t.primary_key[0]] if t.primary_key else None
+
+        row_ids = []
+        for vals in rows:
+            for cidx, idx, ref in fk_checks:
+                v = vals[cidx]
+                if v is not None and v not in idx: raise ValueError(f"FK Integrity Error: {v} not in {ref}")
+            rid = vals[pk_idx] if pk_idx is not None and isinstance(vals[pk_idx], int) else None
+            final_rid = t.insert(vals, row_id=rid)
+            self.trx.log_insert(t.name, final_rid)
+            row_ids.append(final_rid)
+        return {'status': 'success', 'rows_affected': len(row_ids), 'row_ids': row_ids}
+
     def _log_query(self, q):
+        if self._audit_fh is None: return
         try:
-            with open("audit.log", "a") as f:
-                f.write(f"[{datetime.datetime.now().isoformat()}] {q}\n")
-        except: pass
+            self._audit_fh.write(f"[{datetime.datetime.now().isoformat()}] {q}\n")
+        except (OSError, ValueError): pass
 
     def _rollback(self):
         if not self.trx.active: return {'status': 'error', 'message': 'No active transaction'}
         cnt = 0
-        while self.trx.undo_stack:
-            op, pay = self.trx.undo_stack.pop()
+        for tn in self.trx.touched:
+            cnt += self.tables[tn].rollback_pending()
+        for op, tn, rid in self.trx.replay_undo():
             cnt += 1
-            if op == 'DELETE': self.tables[pay[0]].delete(pay[1])
-            elif op == 'INSERT': self.tables[pay[0]].insert(pay[1], row_id=pay[2])
-            elif op == 'UPDATE': self.tables[pay[0]].update_row(pay[1], pay[2])
+            if op == Transaction.OP_INSERT: self.tables[tn].delete(rid)
+        self.trx.reset_log()
         self.trx.active = False
+        self.trx.touched = set()
         return {'status': 'success', 'message': f'Rolled back {cnt} operations'}
 
-    def _create(self, q):
-        if "INDEX" in q.upper():
-            m = re.match(r"CREATE INDEX (\w+) ON (\w+)\s*\((.*)\)", q, re.IGNORECASE)
-            self.tables[m.group(2)].create_index(m.group(1), m.group(3).strip())
+    def _create(self, q, nq):
+        m = _RE_CREATE_INDEX.match(nq)
+        if m:
+            iname, tn, icol = _orig_groups(m, q)
+            self.tables[tn].create_index(iname, icol.strip(), sorted=True)
+            self.schema_version += 1
             return {'status': 'success', 'message': 'Index created'}
-        m = re.match(r"CREATE TABLE (\w+)\s*\((.*)\)", q, re.IGNORECASE)
-        name, body = m.groups()
+        m = _RE_CREATE_TABLE.match(nq)
+        name, body = _orig_groups(m, q)
         defs, curr, lvl = [], "", 0
         for c in body:
             if c == '(': lvl += 1
@@ -276,24 +855,33 @@ class SimpleRDBMS:
         
         cols, pks, fks = [], [], []
         for d in defs:
-            if d.upper().startswith("FOREIGN KEY"):
-                fm = re.match(r"FOREIGN KEY\s*\((.*?)\)\s*REFERENCES\s*(\w+)\s*\((.*?)\)", d, re.IGNORECASE)
-                fks.append({'col': fm.group(1).strip(), 'ref_table': fm.group(2).strip(), 'ref_col': fm.group(3).strip()})
+            d_up = d.upper()
+            if d_up.startswith("FOREIGN KEY"):
+                fm = _RE_FK.match(d_up)
+                fcol, frt, frc = _orig_groups(fm, d)
+                fks.append({'col': fcol.strip(), 'ref_table': frt.strip(), 'ref_col': frc.strip()})
             else:
                 p = d.split()
                 cn, ct = p[0], p[1]
                 cs = []
-                d_up = d.upper()
                 if "PRIMARY KEY" in d_up: cs.append(Constraint.PRIMARY_KEY); pks.append(cn)
                 if "NOT NULL" in d_up: cs.append(Constraint.NOT_NULL)
                 if "UNIQUE" in d_up: cs.append(Constraint.UNIQUE)
                 cols.append({'name': cn, 'type': ct, 'constraints': cs})
         self.tables[name] = Table(name, cols, pks, fks)
+        # FK columns get hash indexes on both sides so integrity checks stay O(1)
+        for fk in fks:
+            self.tables[name].create_index(f"idx_{fk['col']}", fk['col'])
+            rt = self.tables.get(fk['ref_table'])
+            if rt and fk['ref_col'] != (rt.primary_key[0] if rt.primary_key else None):
+                if f"idx_{fk['ref_col']}" not in rt.indexes:
+                    rt.create_index(f"idx_{fk['ref_col']}", fk['ref_col'])
+        self.schema_version += 1
         return {'status': 'success', 'message': f'Table {name} created'}
 
-    def _insert(self, q):
-        m = re.match(r"INSERT INTO (\w+).+VALUES\s*\((.*)\)", q, re.IGNORECASE)
-        tn, vstr = m.groups()
+    def _insert(self, q, nq):
+        m = _RE_INSERT.match(nq)
+        tn, vstr = _orig_groups(m, q)
         if tn not in self.tables: raise ValueError(f"Table {tn} not found")
         t = self.tables[tn]
         vals = self._parse_args(vstr)
@@ -302,12 +890,12 @@ class SimpleRDBMS:
             val = vals[t.column_map[fk['col']]]
             if val is not None:
                 rt = self.tables[fk['ref_table']]
-                ridx = rt.column_map[fk['ref_col']]
-                found = False
-                if fk['ref_col'] == rt.primary_key[0] and val in rt.indexes.get('__pk__', {}): found = True
+                if rt.primary_key and fk['ref_col'] == rt.primary_key[0]:
+                    found = val in rt.indexes.get('__pk__', {})
                 else:
-                    for r in rt.rows.values():
-                        if str(r[ridx]) == str(val): found = True; break
+                    idx_name = f"idx_{fk['ref_col']}"
+                    if idx_name not in rt.indexes: rt.create_index(idx_name, fk['ref_col'])
+                    found = val in rt.indexes[idx_name]
                 if not found: raise ValueError(f"FK Integrity Error: {val} not in {fk['ref_table']}")
 
         # --- FIX: Use PK as Row ID if Integer ---
@@ -322,9 +910,9 @@ class SimpleRDBMS:
         self.trx.log_insert(tn, final_rid)
         return {'status': 'success', 'row_id': final_rid}
 
-    def _delete(self, q):
-        m = re.match(r"DELETE FROM (\w+)(?:\s+WHERE\s+(.*))?", q, re.IGNORECASE)
-        tn, where = m.groups()
+    def _delete(self, q, nq):
+        m = _RE_DELETE.match(nq)
+        tn, where = _orig_groups(m, q)
         t = self.tables[tn]
         rows = t.select(self._parse_where(where))
         
@@ -333,19 +921,20 @@ class SimpleRDBMS:
                 for fk in otbl.foreign_keys:
                     if fk['ref_table'] == tn:
                         pidx = t.column_map[fk['ref_col']]
-                        cidx = otbl.column_map[fk['col']]
-                        for crow in otbl.rows.values():
-                            if str(crow[cidx]) == str(row[pidx]):
-                                raise ValueError(f"FK Integrity Error: Referenced by {oname}")
+                        idx_name = f"idx_{fk['col']}"
+                        if idx_name not in otbl.indexes: otbl.create_index(idx_name, fk['col'])
+                        if otbl.indexes[idx_name].get(row[pidx]):
+                            raise ValueError(f"FK Integrity Error: Referenced by {oname}")
         
+        deferred = self.trx.active
         for rid, row in rows:
-            self.trx.log_delete(tn, row[:], rid)
-            t.delete(rid)
+            t.delete(rid, deferred=deferred)
+        if deferred and rows: self.trx.touch(tn)
         return {'status': 'success', 'rows_affected': len(rows)}
 
-    def _update(self, q):
-        m = re.match(r"UPDATE (\w+) SET (.*?)(?:\s+WHERE\s+(.*))?", q, re.IGNORECASE)
-        tn, sstr, where = m.groups()
+    def _update(self, q, nq):
+        m = _RE_UPDATE.match(nq)
+        tn, sstr, where = _orig_groups(m, q)
         t = self.tables[tn]
         
         # --- FIX: Robust Parsing ---
@@ -356,30 +945,190 @@ class SimpleRDBMS:
             ups[parts[0].strip()] = self._val(parts[1])
 
         rows = t.select(self._parse_where(where))
+        deferred = self.trx.active
         for rid, row in rows:
-            self.trx.log_update(tn, rid, row[:])
             nr = row[:]
-            for k,v in ups.items(): 
+            for k,v in ups.items():
                 if k in t.column_map: nr[t.column_map[k]] = v
-            t.update_row(rid, nr)
+            t.update_row(rid, nr, deferred=deferred)
+        if deferred and rows: self.trx.touch(tn)
         return {'status': 'success', 'rows_affected': len(rows)}
 
-    def _select(self, q):
-        m = re.match(r"SELECT (.*?) FROM (\w+)(?:\s+WHERE\s+(.*))?", q, re.IGNORECASE)
-        cols, tn, where = m.groups()
+    def _select(self, q, nq):
+        if " JOIN " in nq: return self._select_join(q, nq)
+        m = _RE_SELECT.match(nq)
+        if not m: raise ValueError(f"Unsupported SELECT syntax: {q}")
+        cols, tn, where, group = _orig_groups(m, q)
         t = self.tables[tn]
-        data = t.select(self._parse_where(where))
-        rows = [d[1] for d in data]
-        cnames = [c['name'] for c in t.columns]
-        if cols.strip() != '*':
-            req = [c.strip() for c in cols.split(',')]
-            idxs = [t.column_map[c] for c in req if c in t.column_map]
-            rows = [[r[i] for i in idxs] for r in rows]
-            cnames = req
+        ncols = nq[m.start(1):m.end(1)]
+        if group or any(f in ncols for f in ("SUM(", "COUNT(", "AVG(", "MIN(", "MAX(")):
+            return self._select_agg(t, cols, where, group)
+        conds = self._parse_where(where)
+        if cols.strip() == '*':
+            cnames = [c['name'] for c in t.columns]
+            rows = t.select(conds, projection=list(range(len(t.columns))))
+        else:
+            cnames = [c.strip() for c in cols.split(',')]
+            idxs = [t.column_map[c] for c in cnames if c in t.column_map]
+            rows = t.select(conds, projection=idxs)
         return {'status': 'success', 'columns': cnames, 'rows': rows}
 
-    def _drop(self, q):
+    def _select_join(self, q, nq):
+        m = _RE_JOIN.match(nq)
+        if not m: raise ValueError("Unsupported JOIN syntax. Use: SELECT ... FROM t1 JOIN t2 ON t1.c = t2.c")
+        cols_req, t1n, t2n, la, lc, ra, rc, where = _orig_groups(m, q)
+        if t1n not in self.tables or t2n not in self.tables: raise ValueError("One or more tables not found")
+        t1, t2 = self.tables[t1n], self.tables[t2n]
+        if la == t1n and ra == t2n: c1, c2 = lc, rc
+        elif la == t2n and ra == t1n: c1, c2 = rc, lc
+        else: raise ValueError("JOIN ON must reference both joined tables")
+        if c1 not in t1.column_map or c2 not in t2.column_map: raise ValueError("Column in JOIN ON clause not found")
+        i1, i2 = t1.column_map[c1], t2.column_map[c2]
+
+        # Hash join: build on the smaller side, probe the larger
+        build_t, probe_t = (t1, t2) if len(t1.row_ids) <= len(t2.row_ids) else (t2, t1)
+        build_is_t1 = build_t is t1
+        b_idx, p_idx = (i1, i2) if build_is_t1 else (i2, i1)
+        hash_map = self._join_build_map(build_t, b_idx)
+
+        n1 = len(t1.columns)
+        all_cols = [f"{t1n}.{c['name']}" for c in t1.columns] + [f"{t2n}.{c['name']}" for c in t2.columns]
+        targets = all_cols if cols_req.strip() == '*' else [c.strip() for c in cols_req.split(',')]
+        proj = []
+        for ref in targets:
+            tb, cn = ref.split('.', 1) if '.' in ref else ((t1n if ref in t1.column_map else t2n), ref)
+            if tb == t1n and cn in t1.column_map: proj.append(t1.column_map[cn])
+            elif tb == t2n and cn in t2.column_map: proj.append(n1 + t2.column_map[cn])
+            else: raise ValueError(f"Unknown column in SELECT: {ref}")
+
+        pred = pvals = None
+        if where:
+            items = []
+            for col, op, val in self._parse_where(where):
+                tb, cn = col.split('.', 1) if '.' in col else ((t1n if col in t1.column_map else t2n), col)
+                if tb == t1n and cn in t1.column_map:
+                    ci = t1.column_map[cn]
+                    items.append((ci, op, t1._coerce_literal(ci, val) if op == '=' else val))
+                elif tb == t2n and cn in t2.column_map:
+                    ci = t2.column_map[cn]
+                    items.append((n1 + ci, op, t2._coerce_literal(ci, val) if op == '=' else val))
+            pred, pvals = _compile_row_predicate(items), _predicate_params(items)
+
+        rows_out = []
+        for prow in probe_t.rows.values():
+            matches = hash_map.get(prow[p_idx])
+            if matches is None: continue
+            if isinstance(matches, int): matches = (matches,)  # unique-index build map
+            for b_rid in matches:
+                brow = build_t.get_row(b_rid)
+                combined = (brow + prow) if build_is_t1 else (prow + brow)
+                if pred is not None:
+                    try:
+                        if not pred(combined, pvals): continue
+                    except TypeError: continue
+                rows_out.append([combined[i] for i in proj])
+        return {'status': 'success', 'columns': targets, 'rows': rows_out}
+
+    @staticmethod
+    def _join_build_map(t: Table, col_idx: int) -> Dict[Any, Any]:
+        """Reuse a covering hash index as the build map when one exists."""
+        cname = t.columns[col_idx]['name']
+        if t.primary_key and cname == t.primary_key[0]: return t.indexes.get('__pk__', {})
+        if cname in t.unique_columns: return t.indexes.get(f"__uniq_{cname}", {})
+        if f"idx_{cname}" in t.indexes: return t.indexes[f"idx_{cname}"]
+        hm = {}
+        data = t.columns_data[col_idx]
+        for pos, rid in enumerate(t.row_ids):
+            hm.setdefault(data[pos], []).append(rid)
+        return hm
+
+    def _select_agg(self, t: Table, sel_clause: str, where: str, group: str):
+        specs = []  # (func or None for plain column, col_idx, header)
+        for part in [p.strip() for p in sel_clause.split(',')]:
+            am = _RE_AGG_FUNC.match(part.upper())
+            if am:
+                func, target = am.group(1), part[am.start(2):am.end(2)].strip()
+                idx = t.column_map.get(target) if target != '*' else None
+                specs.append((func, idx, f"{func}({target})"))
+            else:
+                specs.append((None, t.column_map.get(part), part))
+        headers = [s[2] for s in specs]
+        conds = self._parse_where(where)
+
+        g_idx = None
+        if group:
+            g_col = group.strip()
+            if g_col not in t.column_map: raise ValueError(f"Unknown GROUP BY column: {g_col}")
+            g_idx = t.column_map[g_col]
+            # Full-table GROUP BY: one vectorized reduction pass over the column
+            # buffers (only when no transaction overlay is hiding rows)
+            if not conds and np is not None and not t.pending:
+                rows = self._agg_numpy(t, g_idx, specs)
+                if rows is not None: return {'status': 'success', 'columns': headers, 'rows': rows}
+
+        data = t.select(conds)
+        if g_idx is not None:
+            groups = {}
+            for _, row in data:
+                groups.setdefault(row[g_idx], []).append(row)
+        else:
+            groups = {'__global__': [r for _, r in data]}
+
+        out_rows = []
+        for g_rows in groups.values():
+            out = []
+            for func, idx, _ in specs:
+                if func is None:
+                    out.append(g_rows[0][idx] if g_rows and idx is not None else None)
+                    continue
+                if func == 'COUNT':
+                    out.append(len(g_rows)); continue
+                vals = [r[idx] for r in g_rows if isinstance(r[idx], (int, float))] if idx is not None else []
+                if not vals: val = 0
+                elif func == 'SUM': val = sum(vals)
+                elif func == 'AVG': val = sum(vals) / len(vals)
+                elif func == 'MIN': val = min(vals)
+                else: val = max(vals)
+                out.append(round(val, 2) if isinstance(val, float) else val)
+            out_rows.append(out)
+        return {'status': 'success', 'columns': headers, 'rows': out_rows}
+
+    def _agg_numpy(self, t: Table, g_idx: int, specs: List[Tuple]):
+        """Grouped COUNT/SUM/AVG/MIN/MAX via np.unique + bincount; None if not applicable."""
+        try:
+            k_arr = np.asarray(t.columns_data[g_idx])
+        except (TypeError, ValueError):
+            return None
+        if k_arr.dtype == object or k_arr.ndim != 1: return None
+        uniq, inv, counts = np.unique(k_arr, return_inverse=True, return_counts=True)
+        n = len(uniq)
+        cols_out = []
+        for func, idx, _ in specs:
+            if func is None:
+                if idx != g_idx: return None  # non-grouped plain column: fall back
+                cols_out.append(uniq.tolist()); continue
+            if func == 'COUNT':
+                cols_out.append(counts.tolist()); continue
+            arr = t.scan_column(idx) if idx is not None else None
+            if arr is None: return None
+            src_int = arr.dtype.kind in 'iu'
+            arr = arr.astype(np.float64, copy=False)
+            if func == 'SUM':
+                if numba is not None: vals = _nb_sum_groupby(inv.astype(np.int64), arr, n)
+                else: vals = np.bincount(inv, weights=arr, minlength=n)
+            elif func == 'AVG': vals = np.bincount(inv, weights=arr, minlength=n) / counts
+            elif func == 'MIN':
+                vals = np.full(n, np.inf); np.minimum.at(vals, inv, arr)
+            else:
+                vals = np.full(n, -np.inf); np.maximum.at(vals, inv, arr)
+            # SUM/MIN/MAX over an INTEGER column stay ints, like the row path
+            if src_int and func != 'AVG': cols_out.append([int(v) for v in vals])
+            else: cols_out.append([round(float(v), 2) for v in vals])
+        return [list(row) for row in zip(*cols_out)]
+
+    def _drop(self, q, nq):
         self.tables.pop(q.split()[-1], None)
+        self.schema_version += 1
         return {'status': 'success'}
 
     def _val(self, s):
@@ -390,13 +1139,12 @@ class SimpleRDBMS:
         except: return s
 
     def _parse_args(self, s):
-        args, curr, qt = [], [], False
-        for c in s:
-            if c in "'\"": qt = not qt
-            if c == ',' and not qt: args.append("".join(curr).strip()); curr=[]
-            else: curr.append(c)
-        args.append("".join(curr).strip())
-        return [self._val(x) for x in args]
+        args = []
+        for m in _RE_ARG.finditer(s):
+            if m.group(1) is not None: args.append(m.group(1))
+            elif m.group(2) is not None: args.append(m.group(2))
+            else: args.append(self._val(m.group(3)))
+        return args
 
     def _parse_where(self, s) -> List[Tuple]:
         if not s: return []
@@ -414,13 +1162,103 @@ class SimpleRDBMS:
         return conds
 
     def save(self, p=None):
-        d = {n: {'cols': t.columns, 'pk': t.primary_key, 'fk': t.foreign_keys, 'rows': t.rows, 'ctr': t.row_id_counter, 'idx': t.indexes} for n, t in self.tables.items()}
-        with open(p or self.path, 'wb') as f: pickle.dump(d, f)
-    
+        path = p or self.path
+        if np is None:
+            # Fallback: whole-state pickle (same shape load() accepts)
+            d = {n: {'cols': t.columns, 'pk': t.primary_key, 'fk': t.foreign_keys, 'data': t.columns_data, 'row_ids': t.row_ids, 'ctr': t.row_id_counter, 'idx': t.indexes} for n, t in self.tables.items()}
+            with open(path, 'wb') as f: pickle.dump(d, f)
+            return
+        # Columnar binary snapshot: magic + JSON header, then raw column buffers.
+        # Indexes are not persisted; they are rebuilt on load.
+        header, blobs = {}, []
+        for n, t in self.tables.items():
+            col_meta = []
+            for i, col in enumerate(t.columns):
+                data = t.columns_data[i]
+                ctype = col['type'].upper()
+                enc, blob = 'pickle', None
+                try:
+                    if ctype == 'INTEGER' and None not in data:
+                        enc, blob = 'i8', np.asarray(data, dtype=np.int64).tobytes()
+                    elif ctype == 'REAL' and None not in data:
+                        enc, blob = 'f8', np.asarray(data, dtype=np.float64).tobytes()
+                except (TypeError, ValueError, OverflowError):
+                    enc, blob = 'pickle', None
+                if blob is None: blob = pickle.dumps(data)
+                col_meta.append({'enc': enc, 'size': len(blob)})
+                blobs.append(blob)
+            rid_blob = np.asarray(t.row_ids, dtype=np.int64).tobytes()
+            blobs.append(rid_blob)
+            header[n] = {
+                'cols': [{'name': c['name'], 'type': c['type'], 'constraints': [k.name for k in c['constraints']]} for c in t.columns],
+                'pk': t.primary_key, 'fk': t.foreign_keys, 'ctr': t.row_id_counter,
+                'col_meta': col_meta, 'rid_size': len(rid_blob),
+                'sec_idx': [[nm, t._index_cols[nm], nm in t._sorted_keys] for nm in t.indexes if nm in t._index_cols],
+            }
+        hdr = json.dumps(header).encode('utf-8')
+        with open(path, 'wb') as f:
+            f.write(_SNAP_MAGIC)
+            f.write(struct.pack('<I', len(hdr)))
+            f.write(hdr)
+            for blob in blobs: f.write(blob)
+
     def load(self, p=None):
-        if not os.path.exists(p or self.path): return
-        with open(p or self.path, 'rb') as f:
-            for n, d in pickle.load(f).items():
-                t = Table(n, d['cols'], d['pk'], d.get('fk'))
-                t.rows, t.row_id_counter, t.indexes = d['rows'], d['ctr'], d['idx']
-                self.tables[n] = t
\ No newline at end of file
+        path = p or self.path
+        if not os.path.exists(path): return
+        with open(path, 'rb') as f:
+            if f.read(len(_SNAP_MAGIC)) != _SNAP_MAGIC:
+                # Legacy pickle snapshot
+                f.seek(0)
+                snap = pickle.load(f)
+                if 'tables' in snap and all(isinstance(v, dict) and 'schema' in v for v in snap['tables'].values()):
+                    # Oldest dumps wrapped everything under a 'tables' key with
+                    # longer field names; alias them to the flat shape
+                    snap = {n: {'cols': d['schema'], 'pk': d['pk'], 'fk': d.get('fk'),
+                                'rows': d['rows'], 'ctr': d['counter'], 'idx': d['indexes']}
+                            for n, d in snap['tables'].items()}
+                for n, d in snap.items():
+                    t = Table(n, d['cols'], d['pk'], d.get('fk'))
+                    if 'rows' in d:
+                        # Pre-series shape: a {row_id: [values]} dict; decompose
+                        # into the columnar buffers
+                        t.row_ids = list(d['rows'].keys())
+                        if t.row_ids:
+                            t.columns_data = [list(col) for col in zip(*d['rows'].values())]
+                    else:
+                        t.columns_data, t.row_ids = d['data'], d['row_ids']
+                    t.row_pos = {rid: pos for pos, rid in enumerate(t.row_ids)}
+                    t.row_id_counter, t.indexes = d['ctr'], d['idx']
+                    # Older snapshots stored a set per PK/UNIQUE value; unwrap to the row id
+                    for iname, idx in t.indexes.items():
+                        if iname == '__pk__' or iname.startswith('__uniq_'):
+                            t.indexes[iname] = {k: next(iter(v)) if isinstance(v, set) else v for k, v in idx.items()}
+                        else:
+                            # Map the index back to its column: idx_<col> or idx_<table>_<col>
+                            col = iname[4:] if iname.startswith('idx_') else iname
+                            if col not in t.column_map and col.startswith(f"{n}_"): col = col[len(n) + 1:]
+                            if col in t.column_map: t.create_index(iname, col, sorted=True)
+                    t._rebuild_index_specs()
+                    self.tables[n] = t
+                self.schema_version += 1
+                return
+            header = json.loads(f.read(struct.unpack('<I', f.read(4))[0]).decode('utf-8'))
+            for n, d in header.items():
+                cols = [{'name': c['name'], 'type': c['type'], 'constraints': [Constraint[k] for k in c['constraints']]} for c in d['cols']]
+                t = Table(n, cols, d['pk'], d.get('fk'))
+                for i, meta in enumerate(d['col_meta']):
+                    raw = f.read(meta['size'])
+                    if meta['enc'] == 'i8': t.columns_data[i] = np.frombuffer(raw, dtype=np.int64).tolist()
+                    elif meta['enc'] == 'f8': t.columns_data[i] = np.frombuffer(raw, dtype=np.float64).tolist()
+                    else: t.columns_data[i] = pickle.loads(raw)
+                t.row_ids = np.frombuffer(f.read(d['rid_size']), dtype=np.int64).tolist()
+                t.row_pos = {rid: pos for pos, rid in enumerate(t.row_ids)}
+                t.row_id_counter = d['ctr']
+                # Rebuild PK/UNIQUE indexes in one pass, then any secondary indexes
+                ncols = len(cols)
+                for pos, rid in enumerate(t.row_ids):
+                    t._update_indexes(rid, [t.columns_data[i][pos] for i in range(ncols)])
+                for entry in d.get('sec_idx', []):
+                    nm, col, srt = entry if len(entry) == 3 else (entry[0], entry[1], False)
+                    t.create_index(nm, col, sorted=srt)
+                self.tables[n] = t
+        self.schema_version += 1
\ No newline at end of file
@@ -1,139 +1,443 @@
 # rdbms_enhanced.py
-from rdbms_core import SimpleRDBMS
+from collections import defaultdict, OrderedDict
+from rdbms_core import SimpleRDBMS, _normalize_ws
 import re
 import time
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    import pandas as pd
+except ImportError:
+    pd = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+if njit is not None and np is not None:
+    @njit(cache=True)
+    def _group_reduce(cols):
+        """Single compiled pass over a (n_cols, n_rows) float64 block; returns
+        (n_cols, 3) of [sum, min, max]."""
+        out = np.empty((cols.shape[0], 3), np.float64)
+        for j in range(cols.shape[0]):
+            s = 0.0
+            mn = cols[j, 0]
+            mx = cols[j, 0]
+            for i in range(cols.shape[1]):
+                v = cols[j, i]
+                s += v
+                if v < mn: mn = v
+                if v > mx: mx = v
+            out[j, 0] = s; out[j, 1] = mn; out[j, 2] = mx
+        return out
+else:
+    _group_reduce = None
+
+# Below this many rows a Python accumulator pass beats building an ndarray
+_NP_GROUP_MIN = 64
+# Both join sides must be at least this big before a DataFrame merge pays off
+_PD_JOIN_MIN = 1000
+# Radix-partition the hand-built hash join above this build-side size so each
+# partition's hash table stays cache-resident
+_RADIX_MIN = 32768
+_RADIX_P = 64
+# Parsed query plans kept per (schema_version, SQL text); LRU-evicted above this
+_PLAN_CACHE_MAX = 256
+
+# Query patterns compiled once at import instead of re.match(literal) per query
+_AGG_RE = re.compile(r"SELECT (.*?) FROM (\w+)(?:\s+WHERE\s+(.*?))?(?:\s+GROUP BY\s+(.*))?$", re.IGNORECASE)
+_JOIN_RE = re.compile(r"SELECT (.*?) FROM (\w+) (?:INNER )?JOIN (\w+) ON (.*?)"
+                      r"(?:\s+WHERE\s+(.*?))?(?:\s+ORDER BY\s+(\S+)(?:\s+(ASC|DESC))?)?"
+                      r"(?:\s+LIMIT\s+(\d+))?$", re.IGNORECASE)
+_FUNC_RE = re.compile(r"(SUM|AVG|COUNT|MIN|MAX)\((.*?)\)", re.IGNORECASE)
+_AGG_FUNCS = ("SUM(", "COUNT(", "AVG(", "MIN(", "MAX(")
+
 class EnhancedRDBMS(SimpleRDBMS):
+    def __init__(self, path: str = None):
+        super().__init__(path)
+        self._df_cache = {}  # table name -> (table, data_version, DataFrame)
+        self._plan_cache = OrderedDict()  # (kind, schema_version, query) -> plan tuple
+
     def execute(self, query: str):
-        clean_query = " ".join(query.strip().split())
+        clean_query = _normalize_ws(query)
         self._log_query(clean_query) # Log before routing
         
+        # Case folded exactly once per query; everything below reuses this string
         q_upper = clean_query.upper()
-        if q_upper.startswith("SELECT"):
-            if " JOIN " in q_upper: return self._exec_join(clean_query)
-            if "GROUP BY" in q_upper or any(f in q_upper for f in ["SUM(", "COUNT(", "AVG(", "MIN(", "MAX("]):
+        tokens = q_upper.split()
+        if not tokens or tokens[0] != "SELECT":
+            return super().execute(clean_query)
+        tok_set = set(tokens)
+        if "JOIN" in tok_set: return self._exec_join(clean_query)
+        if "GROUP" in tok_set: return self._exec_aggregate(clean_query)
+        for t in tokens:
+            if t == "FROM": break
+            if "(" in t and any(f in t for f in _AGG_FUNCS):
                 return self._exec_aggregate(clean_query)
         return super().execute(clean_query)
 
-    def _exec_aggregate(self, query):
-        m = re.match(r"SELECT (.*?) FROM (\w+)(?:\s+WHERE\s+(.*?))?(?:\s+GROUP BY\s+(.*))?$", query, re.IGNORECASE)
-        if not m: return super().execute(query)
-        
+    def _cached_plan(self, kind, query, build):
+        """LRU plan cache: re-parsing is skipped for SQL text seen before under
+        the current schema. Misses and error results are not cached."""
+        key = (kind, self.schema_version, query)
+        plan = self._plan_cache.get(key)
+        if plan is not None:
+            self._plan_cache.move_to_end(key)
+            return plan
+        plan = build(query)
+        if plan is not None and not isinstance(plan, dict):
+            self._plan_cache[key] = plan
+            if len(self._plan_cache) > _PLAN_CACHE_MAX:
+                self._plan_cache.popitem(last=False)
+        return plan
+
+    def _plan_aggregate(self, query):
+        """Parse an aggregate SELECT into a reusable plan tuple; None when the
+        query doesn't match, an error dict for resolution failures."""
+        m = _AGG_RE.match(query)
+        if not m: return None
         sel_clause, t_name, where_clause, group_clause = m.groups()
         if t_name not in self.tables: return {'status': 'error', 'message': 'Table not found'}
         table = self.tables[t_name]
-        
-        # New: _parse_where returns list, select accepts list
-        raw_data_tuples = table.select(self._parse_where(where_clause))
-        rows = [x[1] for x in raw_data_tuples]
-        
-        groups = {}
+
+        # Parse the select list once; it is identical for every group
+        specs = []  # (func or None for a plain column, col_idx, header)
+        for part in [x.strip() for x in sel_clause.split(',')]:
+            agg_match = _FUNC_RE.match(part)
+            if agg_match:
+                func, target = agg_match.group(1).upper(), agg_match.group(2).strip()
+                t_idx = table.column_map.get(target) if func != 'COUNT' else None
+                specs.append((func, t_idx, f"{func}({target})"))
+            elif part in table.column_map:
+                specs.append((None, table.column_map[part], part))
+        final_headers = [s[2] for s in specs]
+
+        g_idx = None
         if group_clause:
             group_col = group_clause.strip()
             if group_col not in table.column_map: return {'status': 'error', 'message': f'Unknown GROUP BY column: {group_col}'}
             g_idx = table.column_map[group_col]
+
+        # Distinct columns needing a reduction; one accumulator slot per column so
+        # SUM(x)/AVG(x) in the same query share a single pass over the group
+        reduce_cols = list({t_idx for func, t_idx, _ in specs
+                            if func is not None and func != 'COUNT' and t_idx is not None})
+        col_acc = {t_idx: k for k, t_idx in enumerate(reduce_cols)}
+        # Numeric columns can reduce through a contiguous ndarray (C loops)
+        np_dtypes = {}
+        if np is not None:
+            for t_idx in reduce_cols:
+                ctype = table.columns[t_idx]['type'].upper()
+                if ctype == 'INTEGER': np_dtypes[t_idx] = np.int64
+                elif ctype == 'REAL': np_dtypes[t_idx] = np.float64
+        conds = self._parse_where(where_clause)
+        return (t_name, specs, final_headers, g_idx, where_clause, conds,
+                reduce_cols, col_acc, np_dtypes)
+
+    def _exec_aggregate(self, query):
+        plan = self._cached_plan('agg', query, self._plan_aggregate)
+        if plan is None: return super().execute(query)
+        if isinstance(plan, dict): return plan
+        (t_name, specs, final_headers, g_idx, where_clause, conds,
+         reduce_cols, col_acc, np_dtypes) = plan
+        table = self.tables[t_name]
+
+        # SoA fast path: no WHERE means we can reduce the columnar buffers
+        # directly and skip row materialization altogether
+        if not where_clause and specs and np is not None and not table.pending:
+            if g_idx is not None:
+                np_rows = self._agg_numpy(table, g_idx, specs)
+                if np_rows is not None:
+                    return {'status': 'success', 'columns': final_headers, 'rows': np_rows}
+            else:
+                result_row, ok = [], True
+                for func, t_idx, _ in specs:
+                    if func == 'COUNT':
+                        result_row.append(len(table.row_ids)); continue
+                    arr = table.scan_column(t_idx) if func is not None and t_idx is not None else None
+                    if arr is None: ok = False; break
+                    if arr.shape[0] == 0: result_row.append(0); continue
+                    if func == 'SUM': val = arr.sum().item()
+                    elif func == 'AVG': val = arr.mean().item()
+                    elif func == 'MIN': val = arr.min().item()
+                    else: val = arr.max().item()
+                    result_row.append(round(val, 2) if isinstance(val, float) else val)
+                if ok:
+                    return {'status': 'success', 'columns': final_headers, 'rows': [result_row]}
+
+        # New: _parse_where returns list, select accepts list
+        raw_data_tuples = table.select(conds)
+        rows = [x[1] for x in raw_data_tuples]
+
+        if g_idx is not None:
+            groups = defaultdict(list)
             for r in rows:
-                key = r[g_idx]
-                if key not in groups: groups[key] = []
-                groups[key].append(r)
-        else: groups['__global__'] = rows
-        
-        sel_parts = [x.strip() for x in sel_clause.split(',')]
+                groups[r[g_idx]].append(r)
+        else: groups = {'__global__': rows}
+
         final_rows = []
-        final_headers = []
-        headers_built = False
-        
-        for g_key, g_rows in groups.items():
+        for g_rows in groups.values():
+            n = len(reduce_cols)
+            sums = [0] * n; mins = [None] * n; maxs = [None] * n; cnts = [0] * n
+            reduced = False
+            if n and _group_reduce is not None and len(g_rows) >= _NP_GROUP_MIN and len(np_dtypes) == n:
+                # Fused JIT kernel: one compiled pass for every reduce column;
+                # None in the data raises TypeError and drops to the paths below
+                try:
+                    block = np.array([[r[t_idx] for r in g_rows] for t_idx in reduce_cols], np.float64)
+                except TypeError:
+                    block = None
+                if block is not None:
+                    stats = _group_reduce(block)
+                    for k, t_idx in enumerate(reduce_cols):
+                        cnts[k] = block.shape[1]
+                        as_int = np_dtypes[t_idx] is np.int64
+                        sums[k] = int(stats[k, 0]) if as_int else stats[k, 0]
+                        mins[k] = int(stats[k, 1]) if as_int else stats[k, 1]
+                        maxs[k] = int(stats[k, 2]) if as_int else stats[k, 2]
+                    reduced = True
+            if n and not reduced and len(g_rows) >= _NP_GROUP_MIN and len(np_dtypes) == n:
+                for k, t_idx in enumerate(reduce_cols):
+                    # Every column here is declared numeric (np_dtypes covers all
+                    # of them), so a None check replaces the isinstance filter
+                    arr = np.fromiter((r[t_idx] for r in g_rows if r[t_idx] is not None),
+                                      dtype=np_dtypes[t_idx])
+                    cnts[k] = arr.shape[0]
+                    if cnts[k]:
+                        sums[k] = arr.sum().item()
+                        mins[k] = arr.min().item()
+                        maxs[k] = arr.max().item()
+            elif n and not reduced:
+                # Declared-numeric columns only need a None check; the isinstance
+                # dispatch stays for TEXT-typed columns holding mixed values
+                num_fast = [table.numeric_mask[t_idx] for t_idx in reduce_cols]
+                for r in g_rows:
+                    for k, t_idx in enumerate(reduce_cols):
+                        v = r[t_idx]
+                        if v is None or (not num_fast[k] and not isinstance(v, (int, float))):
+                            continue
+                        cnts[k] += 1
+                        sums[k] += v
+                        if mins[k] is None or v < mins[k]: mins[k] = v
+                        if maxs[k] is None or v > maxs[k]: maxs[k] = v
             result_row = []
-            current_headers = []
-            for part in sel_parts:
-                agg_match = re.match(r"(SUM|AVG|COUNT|MIN|MAX)\((.*?)\)", part, re.IGNORECASE)
-                if agg_match:
-                    func, target = agg_match.groups()
-                    target = target.strip()
-                    val = 0
-                    if func == 'COUNT': val = len(g_rows)
-                    else:
-                        if target in table.column_map:
-                            t_idx = table.column_map[target]
-                            values = [r[t_idx] for r in g_rows if isinstance(r[t_idx], (int, float))]
-                            if not values: val = 0
-                            elif func == 'SUM': val = sum(values)
-                            elif func == 'AVG': val = sum(values) / len(values)
-                            elif func == 'MIN': val = min(values)
-                            elif func == 'MAX': val = max(values)
-                    if isinstance(val, float): val = round(val, 2)
-                    result_row.append(val)
-                    if not headers_built: current_headers.append(f"{func}({target})")
-                else:
-                    if part in table.column_map:
-                        idx = table.column_map[part]
-                        result_row.append(g_rows[0][idx] if g_rows else None)
-                        if not headers_built: current_headers.append(part)
+            for func, t_idx, _ in specs:
+                if func is None:
+                    result_row.append(g_rows[0][t_idx] if g_rows else None)
+                    continue
+                if func == 'COUNT':
+                    result_row.append(len(g_rows))
+                    continue
+                k = col_acc.get(t_idx)
+                if k is None or cnts[k] == 0: val = 0
+                elif func == 'SUM': val = sums[k]
+                elif func == 'AVG': val = sums[k] / cnts[k]
+                elif func == 'MIN': val = mins[k]
+                else: val = maxs[k]
+                if isinstance(val, float): val = round(val, 2)
+                result_row.append(val)
             final_rows.append(result_row)
-            if not headers_built: final_headers = current_headers; headers_built = True
         return {'status': 'success', 'columns': final_headers, 'rows': final_rows}
 
-    def _exec_join(self, query):
-        m = re.match(r"SELECT (.*?) FROM (\w+) (?:INNER )?JOIN (\w+) ON (.*)", query, re.IGNORECASE)
-        if not m: return super().execute(query)
-        cols_req, t1_name, t2_name, on_cond = m.groups()
+    def _plan_join(self, query):
+        """Parse a two-table join into a reusable plan tuple; None when the
+        query doesn't match, an error dict for resolution failures."""
+        m = _JOIN_RE.match(query)
+        if not m: return None
+        cols_req, t1_name, t2_name, on_cond, where_clause, ord_ref, ord_dir, limit = m.groups()
         if t1_name not in self.tables or t2_name not in self.tables: return {'status': 'error', 'message': 'One or more tables not found'}
         if ' JOIN ' in on_cond.upper(): return {'status': 'error', 'message': 'Complex nested JOINs are not supported. Use Single JOIN.'}
-        
-        try:
-            parts = on_cond.split('=')
-            if len(parts) != 2: raise ValueError()
-            left, right = [x.strip() for x in parts]
-        except: return {'status': 'error', 'message': 'Invalid JOIN condition. Use: table1.col = table2.col'}
-        
+
+        parts = on_cond.split('=')
+        if len(parts) != 2: return {'status': 'error', 'message': 'Invalid JOIN condition. Use: table1.col = table2.col'}
+        left, right = parts[0].strip(), parts[1].strip()
+
         t1, t2 = self.tables[t1_name], self.tables[t2_name]
         def resolve_col(ref): return ref.split('.') if '.' in ref else (None, ref)
         ltbl, lcol = resolve_col(left)
         rtbl, rcol = resolve_col(right)
-        try:
-            if ltbl == t1_name: idx1, idx2 = t1.column_map[lcol], t2.column_map[rcol]
-            else: idx1, idx2 = t1.column_map[rcol], t2.column_map[lcol]
-        except: return {'status': 'error', 'message': 'Column in JOIN ON clause not found'}
-        
+        c1, c2 = (lcol, rcol) if ltbl == t1_name else (rcol, lcol)
+        idx1, idx2 = t1.column_map.get(c1), t2.column_map.get(c2)
+        if idx1 is None or idx2 is None: return {'status': 'error', 'message': 'Column in JOIN ON clause not found'}
+
+        all_cols = [f"{t1_name}.{c['name']}" for c in t1.columns] + [f"{t2_name}.{c['name']}" for c in t2.columns]
+        target_cols = all_cols if cols_req.strip() == '*' else [c.strip() for c in cols_req.split(',')]
+
+        # Projection plan resolved once up front: (from_t1, col_idx) per output
+        # column, None for unknown references (emitted as NULL, as before)
+        proj = []
+        for req in target_cols:
+            tbl_ref, col_ref = resolve_col(req)
+            if tbl_ref == t1_name and col_ref in t1.column_map: proj.append((True, t1.column_map[col_ref]))
+            elif tbl_ref == t2_name and col_ref in t2.column_map: proj.append((False, t2.column_map[col_ref]))
+            elif not tbl_ref and col_ref in t1.column_map: proj.append((True, t1.column_map[col_ref]))
+            elif not tbl_ref and col_ref in t2.column_map: proj.append((False, t2.column_map[col_ref]))
+            else: proj.append(None)
+
+        # Push WHERE conjuncts down to the side they qualify; the filtered row
+        # counts (not raw table sizes) then pick the hash-join build side
+        conds1, conds2 = [], []
+        if where_clause:
+            for col, op, val in self._parse_where(where_clause):
+                ctbl, cname = col.split('.', 1) if '.' in col else (None, col)
+                if ctbl == t1_name and cname in t1.column_map: conds1.append((cname, op, val))
+                elif ctbl == t2_name and cname in t2.column_map: conds2.append((cname, op, val))
+                elif ctbl is None and cname in t1.column_map: conds1.append((cname, op, val))
+                elif ctbl is None and cname in t2.column_map: conds2.append((cname, op, val))
+                else: return {'status': 'error', 'message': f"Column '{col}' in WHERE clause not found"}
+
+        order = None  # (from_t1, col_idx, descending)
+        if ord_ref:
+            otbl, ocol = resolve_col(ord_ref)
+            desc = bool(ord_dir) and ord_dir.upper() == 'DESC'
+            if otbl in (t1_name, None) and ocol in t1.column_map: order = (True, t1.column_map[ocol], desc)
+            elif otbl in (t2_name, None) and ocol in t2.column_map: order = (False, t2.column_map[ocol], desc)
+            else: return {'status': 'error', 'message': f"Column '{ord_ref}' in ORDER BY not found"}
+        return (t1_name, t2_name, idx1, idx2, target_cols, proj, conds1, conds2,
+                order, int(limit) if limit else None)
+
+    def _exec_join(self, query):
+        jplan = self._cached_plan('join', query, self._plan_join)
+        if jplan is None: return super().execute(query)
+        if isinstance(jplan, dict): return jplan
+        t1_name, t2_name, idx1, idx2, target_cols, plan, conds1, conds2, order, limit = jplan
+        t1, t2 = self.tables[t1_name], self.tables[t2_name]
+
+        # Vectorized merge once both sides are big enough; the Python hash join
+        # below stays the fallback for small tables and open transactions
+        if (pd is not None and not conds1 and not conds2 and order is None and limit is None
+                and not t1.pending and not t2.pending
+                and len(t1.row_ids) >= _PD_JOIN_MIN and len(t2.row_ids) >= _PD_JOIN_MIN):
+            result = self._join_pandas(t1, t1_name, idx1, t2, t2_name, idx2, target_cols)
+            if result is not None: return result
+
+        rows1 = [r for _, r in t1.select(conds1)] if conds1 else None
+        rows2 = [r for _, r in t2.select(conds2)] if conds2 else None
+        n1 = len(rows1) if rows1 is not None else len(t1.rows)
+        n2 = len(rows2) if rows2 is not None else len(t2.rows)
+
         build_tbl, probe_tbl = t2, t1
         build_idx, probe_idx = idx2, idx1
-        build_name, probe_name = t2_name, t1_name
-        if len(t1.rows) < len(t2.rows):
+        build_name = t2_name
+        build_rows, probe_rows = rows2, rows1
+        if n1 < n2:
             build_tbl, probe_tbl = t1, t2
             build_idx, probe_idx = idx1, idx2
-            build_name, probe_name = t1_name, t2_name
-
-        hash_map = {}
-        for row in build_tbl.rows.values():
-            key = row[build_idx]
-            if key not in hash_map: hash_map[key] = []
-            hash_map[key].append(row)
-        joined_data = [] 
-        for row in probe_tbl.rows.values():
-            key = row[probe_idx]
-            if key in hash_map:
-                for match in hash_map[key]:
-                    if build_name == t1_name: joined_data.append({'t1': match, 't2': row})
-                    else: joined_data.append({'t1': row, 't2': match})
-
-        final_rows, final_headers = [], []
-        all_cols = [f"{t1_name}.{c['name']}" for c in t1.columns] + [f"{t2_name}.{c['name']}" for c in t2.columns]
-        target_cols = all_cols if cols_req.strip() == '*' else [c.strip() for c in cols_req.split(',')]
-        for row_pair in joined_data:
-            res_row, built_headers = [], not final_headers
-            for req in target_cols:
-                tbl_ref, col_ref = resolve_col(req)
-                val = None
-                if tbl_ref == t1_name: val = row_pair['t1'][t1.column_map[col_ref]]
-                elif tbl_ref == t2_name: val = row_pair['t2'][t2.column_map[col_ref]]
-                elif not tbl_ref:
-                    if col_ref in t1.column_map: val = row_pair['t1'][t1.column_map[col_ref]]
-                    elif col_ref in t2.column_map: val = row_pair['t2'][t2.column_map[col_ref]]
-                res_row.append(val)
-                if built_headers: final_headers.append(req)
-            final_rows.append(res_row)
-        return {'status': 'success', 'columns': final_headers, 'rows': final_rows}
+            build_name = t1_name
+            build_rows, probe_rows = rows1, rows2
+        if probe_rows is None: probe_rows = probe_tbl.rows.values()
+
+        # Re-express the plan against build/probe so the emit below is uniform
+        build_is_t1 = build_name == t1_name
+        bp_plan = [p if p is None else (p[0] == build_is_t1, p[1]) for p in plan]
+        # ORDER BY collects sort keys alongside each output row; a bare LIMIT
+        # stops the probe early instead (row order is unspecified without ORDER)
+        okeys = [] if order is not None else None
+        if order is not None:
+            o_from_build, o_idx = order[0] == build_is_t1, order[1]
+        early_stop = order is None and limit is not None
+
+        final_rows = []
+        if build_rows is None and not build_tbl.pending:
+            # Reuse a PK/UNIQUE/secondary index as the build map when one covers
+            # the join column; _join_build_map only builds from scratch otherwise
+            hash_map = self._join_build_map(build_tbl, build_idx)
+            for row in probe_rows:
+                if early_stop and len(final_rows) >= limit: break
+                matches = hash_map.get(row[probe_idx])
+                if matches is None: continue
+                if isinstance(matches, int): matches = (matches,)  # unique index entry
+                for rid in matches:
+                    match = build_tbl.get_row(rid)
+                    final_rows.append([None if p is None else (match[p[1]] if p[0] else row[p[1]])
+                                       for p in bp_plan])
+                    if okeys is not None: okeys.append(match[o_idx] if o_from_build else row[o_idx])
+        else:
+            # Filtered build side or open transaction overlay: build by hand
+            build_input = build_rows if build_rows is not None else list(build_tbl.rows.values())
+            if len(build_input) > _RADIX_MIN:
+                # Radix-cluster: partition both sides by the low hash bits and run
+                # P independent small joins so each hash table stays cache-sized
+                mask = _RADIX_P - 1
+                build_parts = [[] for _ in range(_RADIX_P)]
+                probe_parts = [[] for _ in range(_RADIX_P)]
+                for row in build_input:
+                    build_parts[hash(row[build_idx]) & mask].append(row)
+                for row in probe_rows:
+                    probe_parts[hash(row[probe_idx]) & mask].append(row)
+                part_pairs = zip(build_parts, probe_parts)
+            else:
+                part_pairs = ((build_input, probe_rows),)
+            for b_part, p_part in part_pairs:
+                hash_map = {}
+                for row in b_part:
+                    key = row[build_idx]
+                    if key not in hash_map: hash_map[key] = []
+                    hash_map[key].append(row)
+                for row in p_part:
+                    if early_stop and len(final_rows) >= limit: break
+                    key = row[probe_idx]
+                    if key in hash_map:
+                        for match in hash_map[key]:
+                            final_rows.append([None if p is None else (match[p[1]] if p[0] else row[p[1]])
+                                               for p in bp_plan])
+                            if okeys is not None: okeys.append(match[o_idx] if o_from_build else row[o_idx])
+                if early_stop and len(final_rows) >= limit: break
+
+        if okeys is not None:
+            pos = sorted(range(len(final_rows)), key=okeys.__getitem__, reverse=order[2])
+            if limit is not None: pos = pos[:limit]
+            final_rows = [final_rows[i] for i in pos]
+        elif limit is not None:
+            final_rows = final_rows[:limit]
+        return {'status': 'success', 'columns': list(target_cols), 'rows': final_rows}
+
+    def _table_df(self, t, t_name):
+        """Lazily build a DataFrame over a table's column buffers; cached until
+        the table's data_version moves."""
+        cached = self._df_cache.get(t_name)
+        if cached is not None and cached[0] is t and cached[1] == t.data_version:
+            return cached[2]
+        df = pd.DataFrame({c['name']: t.columns_data[i] for i, c in enumerate(t.columns)})
+        self._df_cache[t_name] = (t, t.data_version, df)
+        return df
+
+    def _join_pandas(self, t1, t1_name, idx1, t2, t2_name, idx2, target_cols):
+        """Inner join via pd.merge; returns None if the projection cannot be
+        mapped onto the merged frame (caller falls back to the Python join)."""
+        lc_name, rc_name = t1.columns[idx1]['name'], t2.columns[idx2]['name']
+        sfx1, sfx2 = f"__{t1_name}", f"__{t2_name}"
+        df = self._table_df(t1, t1_name).merge(self._table_df(t2, t2_name),
+                                               left_on=lc_name, right_on=rc_name,
+                                               suffixes=(sfx1, sfx2))
+        sel = []
+        for req in target_cols:
+            tbl_ref, col_ref = req.split('.', 1) if '.' in req else (None, req)
+            if tbl_ref == t1_name and col_ref in t1.column_map: sfx = sfx1
+            elif tbl_ref == t2_name and col_ref in t2.column_map: sfx = sfx2
+            elif tbl_ref is None and col_ref in t1.column_map: sfx = sfx1
+            elif tbl_ref is None and col_ref in t2.column_map: sfx = sfx2
+            else: return None
+            suffixed = f"{col_ref}{sfx}"
+            if suffixed in df.columns: sel.append(suffixed)
+            elif col_ref in df.columns: sel.append(col_ref)
+            else: return None
+        # Extract per column so mixed dtypes don't collapse to object/float
+        # (df.values would turn ints into floats and NULLs into nan)
+        out_cols = []
+        for name in sel:
+            s = df[name]
+            vals = s.tolist()
+            if s.isna().any():
+                vals = [None if pd.isna(v) else v for v in vals]
+            out_cols.append(vals)
+        return {'status': 'success', 'columns': target_cols, 'rows': [list(r) for r in zip(*out_cols)]}
 
 class SQLREPL:
     def __init__(self, db): self.db = db
@@ -147,4 +451,5 @@ class SQLREPL:
                 if 'rows' in res:
                     for row in res['rows']: print(row)
                 else: print(res.get('message', 'OK'))
-            except: break
\ No newline at end of file
+            except (EOFError, KeyboardInterrupt): break
+            except Exception as e: print(f"Error: {e}")
\ No newline at end of file
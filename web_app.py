@@ -1,11 +1,19 @@
 # web_app.py
-from flask import Flask, render_template_string, request, jsonify, redirect, url_for, flash
+from flask import Flask, request, jsonify, redirect, url_for, flash
+from jinja2 import Environment
 from rdbms_enhanced import EnhancedRDBMS
 import os
 import time
+import atexit
 import random
+import threading
 from datetime import datetime, timedelta
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 app = Flask(__name__)
 app.secret_key = 'fintech_secure_key'
 DB_FILE = "ledger.db"
@@ -29,13 +37,40 @@ def format_currency_dec(value):
 
 # --- DATABASE FACTORY ---
 class LedgerSystem:
+    FLUSH_INTERVAL = 0.25  # seconds a write may sit in memory before the flusher saves
+
     def __init__(self, path):
         self.path = path
         self.db = None
+        self.lock = threading.Lock()
+        self._dirty = threading.Event()
+        self.write_version = 0  # bumped on every modifying query; keys read caches
+        self._dash_key = None
+        self._dash_ctx = None
         self.load_or_init()
+        # Debounced background saver: writes mark the ledger dirty and return
+        # immediately; the flusher coalesces bursts into one save
+        threading.Thread(target=self._flusher, daemon=True).start()
+        atexit.register(self.flush_now)
 
     def get_instance(self): return self.db
 
+    def mark_dirty(self):
+        self.write_version += 1
+        self._dirty.set()
+
+    def flush_now(self):
+        if self._dirty.is_set():
+            with self.lock:
+                self.db.save(self.path)
+                self._dirty.clear()
+
+    def _flusher(self):
+        while True:
+            self._dirty.wait()
+            time.sleep(self.FLUSH_INTERVAL)
+            self.flush_now()
+
     def load_or_init(self):
         if os.path.exists(self.path):
             try: self.db = EnhancedRDBMS(self.path)
@@ -45,6 +80,7 @@ class LedgerSystem:
     def reset(self):
         if os.path.exists(self.path): os.remove(self.path)
         self._seed()
+        self.write_version += 1
 
     def _seed(self):
         print("--- PROVISIONING LEDGER ---")
@@ -53,18 +89,32 @@ class LedgerSystem:
         self.db.execute("CREATE TABLE accounts (acc_id INTEGER PRIMARY KEY, uid INTEGER, currency TEXT, balance REAL, status TEXT)")
         self.db.execute("CREATE TABLE ledger (tx_id INTEGER PRIMARY KEY, acc_id INTEGER, amount REAL, type TEXT, date DATE)")
 
-        users = [(101,'Alpha Capital','TIER_1','USA'), (102,'Beta Trading','TIER_2','UK'), (103,'Gamma Retail','TIER_3','SG'), (104,'Delta Hedge','TIER_1','USA')]
-        for u in users: self.db.execute(f"INSERT INTO users VALUES ({u[0]}, '{u[1]}', '{u[2]}', '{u[3]}')")
+        # Batched inserts skip SQL parsing entirely (and any quoting issues)
+        users = [[101,'Alpha Capital','TIER_1','USA'], [102,'Beta Trading','TIER_2','UK'], [103,'Gamma Retail','TIER_3','SG'], [104,'Delta Hedge','TIER_1','USA']]
+        self.db.insert_many('users', users)
 
-        accounts = [(1,101,'USD',5000000.0,'ACTIVE'), (2,102,'GBP',250000.0,'ACTIVE'), (3,103,'SGD',12000.0,'FROZEN'), (4,104,'USD',8900000.0,'ACTIVE')]
-        for a in accounts: self.db.execute(f"INSERT INTO accounts VALUES ({a[0]}, {a[1]}, '{a[2]}', {a[3]}, '{a[4]}')")
+        accounts = [[1,101,'USD',5000000.0,'ACTIVE'], [2,102,'GBP',250000.0,'ACTIVE'], [3,103,'SGD',12000.0,'FROZEN'], [4,104,'USD',8900000.0,'ACTIVE']]
+        self.db.insert_many('accounts', accounts)
 
-        for i in range(1, 101):
-            acc = random.choice([1, 2, 3, 4])
-            amt = round(random.uniform(10, 50000), 2)
-            tt = random.choice(['WIRE_IN', 'WIRE_OUT', 'FEE', 'FX_SWAP'])
-            ds = (datetime.now() - timedelta(days=random.randint(0,7))).strftime('%Y-%m-%d')
-            self.db.execute(f"INSERT INTO ledger VALUES ({i}, {acc}, {amt}, '{tt}', '{ds}')")
+        n = 100
+        if np is not None:
+            # Whole-array generation: one pass instead of per-row random/strftime
+            accs = np.random.randint(1, 5, n)
+            amts = np.round(np.random.uniform(10, 50000, n), 2)
+            tts = np.array(['WIRE_IN', 'WIRE_OUT', 'FEE', 'FX_SWAP'])[np.random.randint(0, 4, n)]
+            base = np.datetime64(datetime.now().date())
+            dates = (base - np.random.randint(0, 8, n).astype('timedelta64[D]')).astype(str)
+            ledger_rows = [[i + 1, int(a), float(m), str(t), d]
+                           for i, (a, m, t, d) in enumerate(zip(accs, amts, tts, dates))]
+        else:
+            ledger_rows = []
+            for i in range(1, n + 1):
+                acc = random.choice([1, 2, 3, 4])
+                amt = round(random.uniform(10, 50000), 2)
+                tt = random.choice(['WIRE_IN', 'WIRE_OUT', 'FEE', 'FX_SWAP'])
+                ds = (datetime.now() - timedelta(days=random.randint(0,7))).strftime('%Y-%m-%d')
+                ledger_rows.append([i, acc, amt, tt, ds])
+        self.db.insert_many('ledger', ledger_rows)
 
         self.db.execute("CREATE INDEX idx_ledger_type ON ledger (type)")
         self.db.save(self.path)
@@ -76,43 +126,51 @@ ledger = LedgerSystem(DB_FILE)
 @app.route('/')
 def dashboard():
     db = ledger.get_instance()
-    
-    # Safe data retrieval with defaults
-    res_aum = db.execute("SELECT SUM(balance) FROM accounts WHERE currency = 'USD'")
-    aum = res_aum.get('rows', [[0]])[0][0] or 0
-    
-    res_vol = db.execute("SELECT COUNT(*), SUM(amount) FROM ledger")
-    row_vol = res_vol.get('rows', [[0,0]])[0]
-    tx_count, tx_vol = row_vol[0], row_vol[1]
-    
-    res_flags = db.execute("SELECT COUNT(*) FROM accounts WHERE status = 'FROZEN'")
-    flag_count = res_flags.get('rows', [[0]])[0][0]
-    
-    # SINGLE JOIN Query (Safe)
-    res_recent = db.execute("""
-        SELECT ledger.tx_id, accounts.currency, ledger.type, ledger.amount 
-        FROM ledger 
-        JOIN accounts ON ledger.acc_id = accounts.acc_id
-    """)
-    recent_txs = res_recent.get('rows', [])[-5:] 
-    
-    return render_template_string(BASE_TEMPLATE, page='dashboard', 
-                                  aum=aum, tx_count=tx_count, tx_vol=tx_vol, flag_count=flag_count,
-                                  recent_txs=recent_txs)
+
+    # The four aggregates only change when a write lands, so they are cached
+    # keyed by the ledger's write_version until the next modifying query
+    key = ledger.write_version
+    if ledger._dash_key != key:
+        # Safe data retrieval with defaults
+        res_aum = db.execute("SELECT SUM(balance) FROM accounts WHERE currency = 'USD'")
+        aum = res_aum.get('rows', [[0]])[0][0] or 0
+
+        res_vol = db.execute("SELECT COUNT(*), SUM(amount) FROM ledger")
+        row_vol = res_vol.get('rows', [[0,0]])[0]
+        tx_count, tx_vol = row_vol[0], row_vol[1]
+
+        res_flags = db.execute("SELECT COUNT(*) FROM accounts WHERE status = 'FROZEN'")
+        flag_count = res_flags.get('rows', [[0]])[0][0]
+
+        # SINGLE JOIN Query (Safe); ORDER BY/LIMIT pushed into the join so only
+        # five rows are materialized instead of the whole ledger
+        res_recent = db.execute("""
+            SELECT ledger.tx_id, accounts.currency, ledger.type, ledger.amount
+            FROM ledger
+            JOIN accounts ON ledger.acc_id = accounts.acc_id
+            ORDER BY ledger.tx_id DESC LIMIT 5
+        """)
+        recent_txs = res_recent.get('rows', [])
+
+        ledger._dash_ctx = dict(aum=aum, tx_count=tx_count, tx_vol=tx_vol,
+                                flag_count=flag_count, recent_txs=recent_txs)
+        ledger._dash_key = key
+
+    return _TPL.render(page='dashboard', **ledger._dash_ctx)
 
 # Renamed to /consoles to avoid Werkzeug Debugger conflict
 @app.route('/consoles')
 def console():
     # Pass defaults to prevent template crashing
-    return render_template_string(BASE_TEMPLATE, page='consoles', 
-                                  aum=0, tx_count=0, tx_vol=0, flag_count=0, recent_txs=[])
+    return _TPL.render(page='consoles',
+                       aum=0, tx_count=0, tx_vol=0, flag_count=0, recent_txs=[])
 
 @app.route('/data')
 def data_explorer():
     db = ledger.get_instance()
     tables = [{'name': k, 'rows': len(v.rows), 'cols': [c['name'] for c in v.columns]} for k,v in db.tables.items()]
-    return render_template_string(BASE_TEMPLATE, page='data', tables=tables,
-                                  aum=0, tx_count=0, tx_vol=0, flag_count=0, recent_txs=[])
+    return _TPL.render(page='data', tables=tables,
+                       aum=0, tx_count=0, tx_vol=0, flag_count=0, recent_txs=[])
 
 @app.route('/inspect/<table_name>')
 def inspect(table_name):
@@ -120,8 +178,8 @@ def inspect(table_name):
     if table_name not in db.tables: return redirect('/')
     t = db.tables[table_name]
     raw = {k: v for i, (k, v) in enumerate(t.rows.items()) if i < 15}
-    return render_template_string(BASE_TEMPLATE, page='inspect', t_name=table_name, raw_rows=raw, indexes=t.indexes,
-                                  aum=0, tx_count=0, tx_vol=0, flag_count=0, recent_txs=[])
+    return _TPL.render(page='inspect', t_name=table_name, raw_rows=raw, indexes=t.indexes,
+                       aum=0, tx_count=0, tx_vol=0, flag_count=0, recent_txs=[])
 
 @app.route('/api/query', methods=['POST'])
 def api_query():
@@ -129,9 +187,11 @@ def api_query():
     query = request.json.get('query')
     start = time.perf_counter()
     try:
-        res = db.execute(query)
-        # Auto-save for modifying queries
-        if any(x in query.upper() for x in ['INSERT', 'UPDATE', 'DELETE']): db.save(DB_FILE)
+        with ledger.lock:
+            res = db.execute(query)
+        # Modifying queries just flag the ledger; the background flusher saves
+        q_upper = query.upper()
+        if any(x in q_upper for x in ('INSERT', 'UPDATE', 'DELETE')): ledger.mark_dirty()
         success = res.get('status') == 'success'
     except Exception as e:
         res = {'status': 'error', 'message': str(e)}
@@ -289,5 +349,12 @@ GROUP BY accounts.currency</textarea>
 </html>
 """
 
+# Compiled once at import; render_template_string would hash and look up the
+# string template on every request
+_ENV = Environment(autoescape=True)
+_ENV.filters['money'] = format_currency
+_ENV.filters['money_dec'] = format_currency_dec
+_TPL = _ENV.from_string(BASE_TEMPLATE)
+
 if __name__ == "__main__":
     app.run(debug=True, port=5000)
\ No newline at end of file